@@ -1,5 +1,8 @@
 import os
+import time
+from datetime import datetime
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, worker_process_init
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pdf_summarizer.settings')
@@ -13,4 +16,35 @@ app = Celery('pdf_summarizer')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django app configs.
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+@worker_process_init.connect
+def preload_models(**kwargs):
+    """Load models when a worker process starts if SUMMARIZER_PRELOAD is set."""
+    from django.conf import settings
+
+    if settings.SUMMARIZER_PRELOAD:
+        from summarizer.summarizer_utils import warm_up
+        warm_up()
+
+
+@before_task_publish.connect
+def stamp_published_at(headers=None, **kwargs):
+    """Stamp every message (and every retry) with its publish time for the queue wait metrics."""
+    if headers is not None:
+        headers['published_at'] = time.time()
+
+
+@task_prerun.connect
+def measure_queue_wait(task=None, **kwargs):
+    """Record how long a task waited in its queue before a worker started it (see queue_stats)."""
+    published_at = task.request.get('published_at')
+    queue = (task.request.delivery_info or {}).get('routing_key')
+    if not published_at or not queue or task.request.is_eager:
+        return
+    if task.request.eta:
+        # Scheduled tasks only start waiting once they are due
+        published_at = max(published_at, datetime.fromisoformat(task.request.eta).timestamp())
+
+    from summarizer.queue_utils import record_queue_wait
+    record_queue_wait(queue, max(0.0, time.time() - published_at))
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from kombu import Queue
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -118,10 +119,190 @@ CRISPY_TEMPLATE_PACK = 'bootstrap5'
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'upload_pdf'
 
+# Caches. The file-based 'summaries' cache is shared by web, Celery and
+# model server processes on the same host.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'summaries': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'summaries',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'llm_responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'llm_responses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'queue_metrics': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'queue_metrics',
+    },
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = 'Asia/Kolkata'
\ No newline at end of file
+CELERY_TIMEZONE = 'Asia/Kolkata'
+# Queues, most urgent first. Work a user is waiting on ('interactive') never
+# waits behind uploads ('default', and 'images' for the CPU-heavy OCR), and
+# uploads never wait behind backfills ('bulk', see backfill_summaries). Each
+# queue gets its own worker pool, sized from the depths and waits reported by
+# the queue_stats command:
+#   celery -A pdf_summarizer worker -Q interactive -c 4
+#   celery -A pdf_summarizer worker -Q default
+#   celery -A pdf_summarizer worker -Q images
+#   celery -A pdf_summarizer worker -Q bulk -c 2
+# A worker started without -Q serves every queue, in this order.
+CELERY_TASK_QUEUES = [Queue(name, routing_key=name) for name in ('interactive', 'default', 'images', 'bulk')]
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'summarizer.tasks.translate_summary_task': {'queue': 'interactive'},
+    'summarizer.tasks.translate_image_task': {'queue': 'interactive'},
+    'summarizer.tasks.process_image_task': {'queue': 'images'},
+}
+# With Redis, priority 0 is served first and 9 last (interactive tasks set 0,
+# backfills 9); queues are consumed in the order a worker lists them rather
+# than round-robin
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'queue_order_strategy': 'priority',
+    'priority_steps': list(range(10)),
+    'sep': ':',
+}
+# Queue wait times recorded by the workers (see queue_utils), shared with
+# queue_stats through this cache
+SUMMARIZER_QUEUE_METRICS_CACHE = 'queue_metrics'
+# PDF uploads are summarized by a Celery chain (extract -> chunk -> summarize ->
+# save) and image uploads analyzed by process_image_task while the detail pages
+# poll their progress; translations are queued the same way. Set
+# SUMMARIZER_ASYNC_PIPELINE=0 to do the work in the web process instead,
+# without a worker.
+SUMMARIZER_ASYNC_PIPELINE = os.environ.get('SUMMARIZER_ASYNC_PIPELINE', '1').lower() in ('1', 'true', 'yes')
+# Documents with more chunks than this are summarized by a chord: one task per
+# SUMMARIZER_FANOUT_CHUNKS chunks, picked up by any free worker, and a callback
+# that merges their summaries in order. 0 keeps the whole document in one task.
+SUMMARIZER_FANOUT_CHUNKS = 4
+# Chunk tasks are acknowledged only once done (acks_late), so a task lost with
+# its worker is redelivered; workers take one task at a time so a slow worker
+# does not hold back chunks other workers could run.
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Pipeline steps store a document's plan (its chunks, or the text for Gemini)
+# in this cache and pass only its key; a step that misses it plans again
+SUMMARIZER_PLAN_CACHE = 'summaries'
+SUMMARIZER_PLAN_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Summarization models
+SUMMARIZER_MODEL = 'facebook/bart-large-cnn'
+GEMINI_MODEL = 'gemini-2.0-flash'
+# Gemini API client: requests are throttled to our per-minute quota (with
+# bursts up to GEMINI_BURST), at most GEMINI_MAX_CONCURRENCY are in flight,
+# and 429/5xx responses and timeouts are retried with exponential backoff.
+# GEMINI_API_ENDPOINT overrides the Google endpoint, e.g. with a local stub.
+GEMINI_API_ENDPOINT = os.environ.get('GEMINI_API_ENDPOINT') or None
+GEMINI_REQUESTS_PER_MINUTE = float(os.environ.get('GEMINI_REQUESTS_PER_MINUTE', 15))
+GEMINI_BURST = 4
+GEMINI_MAX_CONCURRENCY = 4
+GEMINI_TIMEOUT = 60
+GEMINI_MAX_RETRIES = 4
+GEMINI_BACKOFF_BASE = 1.0
+GEMINI_BACKOFF_MAX = 30.0
+# Cache alias holding Gemini responses by (model, normalized prompt, generation
+# config); entries expire after the timeout and the oldest are culled past
+# MAX_ENTRIES. Set to None to always call the API.
+GEMINI_RESPONSE_CACHE = 'llm_responses'
+GEMINI_RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+# Documents estimated above GEMINI_MAX_INPUT_TOKENS are split into sections
+# of GEMINI_SECTION_TOKENS, summarized concurrently into notes of at most
+# GEMINI_SECTION_OUTPUT_TOKENS, and the notes are summarized in a final call
+GEMINI_MAX_INPUT_TOKENS = 32000
+GEMINI_SECTION_TOKENS = 16000
+GEMINI_SECTION_OUTPUT_TOKENS = 1024
+# Sentences repeated at the start of the next chunk for context
+SUMMARIZER_CHUNK_OVERLAP = 0
+# Chunks of one document sent to the model per forward pass. With
+# SUMMARIZER_MICRO_BATCHING, SUMMARIZER_MICRO_BATCH_SIZE takes its place;
+# a batch_size passed by the caller caps both.
+SUMMARIZER_BATCH_SIZE = 4
+# Decoding of chunk summaries: 'beam' or 'greedy' are deterministic, so
+# chunk summaries are stored and reused across regenerations, duplicate
+# uploads and overlapping documents; 'sample' varies between runs.
+SUMMARIZER_DECODING = os.environ.get('SUMMARIZER_DECODING', 'beam')
+# 'Fast' summary mode keeps the most salient sentences up to this many tokens
+SUMMARY_FAST_TOKEN_BUDGET = 2048
+# Long documents are summarized map-reduce style: chunk summaries are
+# re-summarized level by level until they fit SUMMARIZER_TARGET_LENGTH tokens.
+# Each level is cached in SUMMARIZER_LEVEL_CACHE unless decoding samples.
+SUMMARIZER_HIERARCHICAL = True
+SUMMARIZER_TARGET_LENGTH = 300
+# Model tiers, best first. Each request gets the best tier whose predicted
+# time (tokens x measured ms/token, plus loading the model if needed) fits
+# SUMMARIZER_LATENCY_BUDGET seconds; the last tier is the fallback.
+# prior_ms_per_token is used until a tier has been measured at runtime.
+# Off by default: set SUMMARIZER_TIER_POLICY=1 to trade summary quality for
+# latency on interactive requests. Background pipeline jobs, which nobody
+# waits on, always use SUMMARIZER_MODEL.
+SUMMARIZER_TIER_POLICY = os.environ.get('SUMMARIZER_TIER_POLICY', '').lower() in ('1', 'true', 'yes')
+SUMMARIZER_LATENCY_BUDGET = 60
+SUMMARIZER_TIER_LOAD_SECONDS = 30
+SUMMARIZER_TIERS = [
+    {'name': 'bart-large', 'model': SUMMARIZER_MODEL, 'prior_ms_per_token': 5.0},
+    {'name': 'distilbart', 'model': 'sshleifer/distilbart-cnn-12-6', 'prior_ms_per_token': 2.5},
+    {'name': 'extractive', 'model': None, 'prior_ms_per_token': 0.02},
+]
+SUMMARIZER_LEVEL_CACHE = 'summaries'
+SUMMARIZER_LEVEL_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+# One summary stream runs per document; other connections to it (a reload, a
+# second tab, an EventSource reconnect) relay its events from this cache. Each
+# event refreshes the lock, which expires SUMMARIZER_STREAM_LOCK_SECONDS after
+# the last one if its process dies. The background pipeline publishes its
+# events here too, so it must be a cache shared with the Celery workers.
+SUMMARIZER_STREAM_CACHE = 'summaries'
+SUMMARIZER_STREAM_LOCK_SECONDS = 60 * 15
+# Inference backend for the BART summarizer on CPU: 'pytorch' (fp32),
+# 'int8' (dynamically quantized Linear layers) or 'onnx' (ONNX Runtime,
+# requires optimum[onnxruntime]). Compare them with benchmark_backends.
+SUMMARIZER_BACKEND = os.environ.get('SUMMARIZER_BACKEND', 'pytorch')
+# Chunk requests of concurrent summaries are collected for up to
+# SUMMARIZER_MICRO_BATCH_WAIT_MS (or until the batch is full) and run together
+SUMMARIZER_MICRO_BATCHING = True
+SUMMARIZER_MICRO_BATCH_SIZE = 8
+SUMMARIZER_MICRO_BATCH_WAIT_MS = 10
+# Weight dtype of local models ('float32', 'float16' or 'bfloat16')
+SUMMARIZER_DTYPE = 'float32'
+# Loaded models are kept in an LRU registry; the least recently used ones are
+# evicted when loading another would exceed this many MB of weights
+MODEL_REGISTRY_MAX_MEMORY_MB = int(os.environ.get('MODEL_REGISTRY_MAX_MEMORY_MB', 4096))
+# A model that failed to load is tried again after this many seconds
+MODEL_REGISTRY_RETRY_SECONDS = 300
+
+# Shared model server (python manage.py run_model_server). When the URL is
+# set, web and Celery workers send summarization requests there instead of
+# loading the model themselves.
+MODEL_SERVER_URL = os.environ.get('MODEL_SERVER_URL')
+MODEL_SERVER_HOST = '127.0.0.1'
+MODEL_SERVER_PORT = 8765
+# Requests waiting for the model beyond this are rejected with 503
+MODEL_SERVER_QUEUE_SIZE = 32
+MODEL_SERVER_TIMEOUT = 600
+# Documents the model server summarizes at once; their chunks share micro-batches
+MODEL_SERVER_WORKERS = 8
+
+# Models load on first use. Set SUMMARIZER_PRELOAD=1 for web (wsgi) and
+# Celery worker processes that should load them at startup instead.
+SUMMARIZER_PRELOAD = os.environ.get('SUMMARIZER_PRELOAD', '').lower() in ('1', 'true', 'yes')
+
+# PDF extraction
+# Documents with at least this many pages are split across a process pool
+PDF_PARALLEL_MIN_PAGES = 64
+# Worker processes for parallel extraction (None = one per CPU core)
+PDF_EXTRACTION_WORKERS = None
+# Pages with fewer characters than this are treated as scans and OCR'd
+PDF_OCR_FALLBACK = True
+PDF_OCR_MIN_CHARS = 10
+PDF_OCR_WORKERS = 2
+PDF_OCR_RESOLUTION = 200
@@ -3,4 +3,12 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pdf_summarizer.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Preload models in the server process when asked to, e.g. before gunicorn
+# forks its workers with --preload, instead of on the first request
+from django.conf import settings  # noqa: E402
+
+if settings.SUMMARIZER_PRELOAD:
+    from summarizer.summarizer_utils import warm_up
+    warm_up()
\ No newline at end of file
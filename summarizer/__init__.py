@@ -1,5 +1,3 @@
-# Import and apply the PyTorch patch to fix deprecation warning
-from .torch_patch import apply_torch_patch
-
-# Apply the patch when the module is imported
-apply_torch_patch()
\ No newline at end of file
+# The PyTorch deprecation patch (torch_patch.apply_torch_patch) is applied by
+# the model registry right before the first model is loaded, so
+# importing the app does not import torch.
\ No newline at end of file
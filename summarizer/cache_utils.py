@@ -0,0 +1,149 @@
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.db import IntegrityError
+
+from .models import ExtractedText, SummaryCache
+from .pdf_utils import extract_pdf_pages
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Chunk summary cache lookups in this process
+summary_cache_stats = {'hits': 0, 'misses': 0}
+_summary_cache_stats_lock = threading.Lock()
+
+
+def compute_file_hash(file_obj) -> str:
+    """
+    Compute the SHA-256 of a file without reading it into memory at once
+
+    Args:
+        file_obj: Path, Django File/UploadedFile or binary file object
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    if isinstance(file_obj, str):
+        with open(file_obj, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    file_obj.seek(0)
+    chunks = file_obj.chunks() if hasattr(file_obj, 'chunks') else iter(lambda: file_obj.read(1024 * 1024), b'')
+    for chunk in chunks:
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def load_extracted_text(content_hash: str) -> Optional[Dict[str, Any]]:
+    """Load previously extracted text for a content hash, or None if it was never stored."""
+    entry = ExtractedText.objects.filter(content_hash=content_hash).first()
+    if entry is None:
+        return None
+    return {
+        'text': zlib.decompress(bytes(entry.compressed_text)).decode('utf-8'),
+        'page_offsets': entry.page_offsets or [],
+        'page_count': entry.page_count,
+        'content_hash': content_hash
+    }
+
+
+def store_extracted_text(content_hash: str, extracted: Dict[str, Any]) -> None:
+    """Compress and store extracted text under its content hash (first writer wins)."""
+    try:
+        ExtractedText.objects.get_or_create(
+            content_hash=content_hash,
+            defaults={
+                'compressed_text': zlib.compress(extracted['text'].encode('utf-8'), 6),
+                'page_count': extracted['page_count'],
+                'page_offsets': extracted['page_offsets'],
+            }
+        )
+    except IntegrityError:
+        # Another request stored the same content concurrently
+        pass
+
+
+def get_or_extract_pdf_text(pdf_file, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get the extracted text of a PDF, parsing the file only if its content is new
+
+    Args:
+        pdf_file: File object or path to the PDF
+        content_hash: SHA-256 of the file if already known
+
+    Returns:
+        Dict with 'text', 'page_offsets', 'page_count' and 'content_hash'
+    """
+    content_hash = content_hash or compute_file_hash(pdf_file)
+    cached = load_extracted_text(content_hash)
+    if cached is not None:
+        logger.debug(f"Extracted text cache hit for {content_hash[:12]}")
+        return cached
+
+    extracted = extract_pdf_pages(pdf_file)
+    store_extracted_text(content_hash, extracted)
+    return dict(extracted, content_hash=content_hash)
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_generation_params(params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def load_cached_summaries(chunks: List[str], model: str, backend: str, params: Dict[str, Any]) -> Dict[int, str]:
+    """
+    Look up stored summaries of chunks produced with the same model and generation parameters
+
+    Args:
+        chunks: Chunk texts
+        model: Model id
+        backend: Inference backend
+        params: Generation parameters (must be deterministic)
+
+    Returns:
+        Dict mapping chunk index to its cached summary (misses are omitted)
+    """
+    hashes = [hash_text(chunk) for chunk in chunks]
+    found = dict(SummaryCache.objects.filter(
+        chunk_hash__in=set(hashes),
+        model=model,
+        backend=backend,
+        params_hash=hash_generation_params(params)
+    ).values_list('chunk_hash', 'summary'))
+
+    cached = {i: found[h] for i, h in enumerate(hashes) if h in found}
+    with _summary_cache_stats_lock:
+        summary_cache_stats['hits'] += len(cached)
+        summary_cache_stats['misses'] += len(chunks) - len(cached)
+    return cached
+
+
+def store_cached_summaries(chunk_summaries: Dict[str, str], model: str, backend: str, params: Dict[str, Any]) -> None:
+    """Store chunk summaries keyed by chunk text (existing entries are kept)."""
+    params_hash = hash_generation_params(params)
+    SummaryCache.objects.bulk_create([
+        SummaryCache(chunk_hash=hash_text(chunk), model=model, backend=backend, params_hash=params_hash, summary=summary)
+        for chunk, summary in chunk_summaries.items() if summary
+    ], ignore_conflicts=True)
+
+
+def get_summary_cache_stats() -> Dict[str, Any]:
+    """Hit ratio of the chunk summary cache since this process started."""
+    with _summary_cache_stats_lock:
+        lookups = summary_cache_stats['hits'] + summary_cache_stats['misses']
+        return {
+            **summary_cache_stats,
+            'hit_ratio': round(summary_cache_stats['hits'] / lookups, 3) if lookups else None
+        }
@@ -0,0 +1,146 @@
+import re
+import logging
+from typing import Any, Callable, Dict, List
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Sentence ends, or paragraph breaks for text without punctuation (lists, headings)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences, collapsing whitespace inside each sentence"""
+    sentences = []
+    for sentence in SENTENCE_BOUNDARY.split(text or ''):
+        sentence = ' '.join(sentence.split())
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def get_max_input_tokens(tokenizer, default: int = 1024) -> int:
+    """Get the model's maximum input length, leaving room for special tokens"""
+    max_length = getattr(tokenizer, 'model_max_length', None) or default
+    # Tokenizers without a configured limit report a huge sentinel value
+    if max_length > 100000:
+        max_length = default
+    return max_length - tokenizer.num_special_tokens_to_add()
+
+
+def _split_long_sentence(ids: List[int], max_tokens: int) -> List[List[int]]:
+    return [ids[i:i + max_tokens] for i in range(0, len(ids), max_tokens)]
+
+
+def chunk_text_by_tokens(text: str, tokenizer, max_tokens: int = None, overlap_sentences: int = 0) -> Dict[str, Any]:
+    """
+    Pack whole sentences into chunks that fit the model's input length
+
+    Token counts come from the model's own tokenizer, so chunks use the full
+    context window without being truncated. Sentences longer than a whole
+    chunk are split on token boundaries.
+
+    Args:
+        text: Text to chunk
+        tokenizer: Hugging Face tokenizer of the summarization model
+        max_tokens: Token budget per chunk (default: model maximum)
+        overlap_sentences: Sentences repeated at the start of the next chunk
+
+    Returns:
+        Dict containing 'chunks', per-chunk 'chunk_tokens', 'chunk_count'
+        and the document's total 'token_count'
+    """
+    max_tokens = max_tokens or get_max_input_tokens(tokenizer)
+    sentences = split_sentences(text)
+    if not sentences:
+        return {'chunks': [], 'chunk_tokens': [], 'chunk_count': 0, 'token_count': 0}
+
+    # Tokenize all sentences in one batch call; the leading space makes
+    # byte-level BPE count each sentence as it appears inside a chunk
+    sentence_ids = tokenizer([' ' + s for s in sentences], add_special_tokens=False)['input_ids']
+
+    pieces = []
+    for sentence, ids in zip(sentences, sentence_ids):
+        if len(ids) <= max_tokens:
+            pieces.append((sentence, len(ids)))
+        else:
+            for part in _split_long_sentence(ids, max_tokens):
+                pieces.append((tokenizer.decode(part).strip(), len(part)))
+
+    chunks = []
+    chunk_tokens = []
+    current = []
+    current_tokens = 0
+    for piece, count in pieces:
+        if current and current_tokens + count > max_tokens:
+            chunks.append(' '.join(p for p, _ in current))
+            chunk_tokens.append(current_tokens)
+            # Carry the last sentences over as context, if they leave room for new text
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            current_tokens = sum(c for _, c in current)
+            if current_tokens + count > max_tokens:
+                current, current_tokens = [], 0
+        current.append((piece, count))
+        current_tokens += count
+
+    if current:
+        chunks.append(' '.join(p for p, _ in current))
+        chunk_tokens.append(current_tokens)
+
+    return {
+        'chunks': chunks,
+        'chunk_tokens': chunk_tokens,
+        'chunk_count': len(chunks),
+        'token_count': sum(len(ids) for ids in sentence_ids)
+    }
+
+
+def chunk_text_by_count(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> Dict[str, Any]:
+    """
+    Pack whole sentences into chunks of at most max_tokens by a token counter
+
+    For models without a local tokenizer (such as Gemini) where an estimate
+    is good enough. Sentences longer than a whole chunk are split on words.
+
+    Args:
+        text: Text to chunk
+        max_tokens: Token budget per chunk
+        count_tokens: Function returning the token count of a piece of text
+
+    Returns:
+        Dict in the same form as chunk_text_by_tokens
+    """
+    pieces = []
+    for sentence in split_sentences(text):
+        count = count_tokens(sentence)
+        if count <= max_tokens:
+            pieces.append((sentence, count))
+            continue
+        words = sentence.split()
+        step = max(1, len(words) * max_tokens // count)
+        for i in range(0, len(words), step):
+            part = ' '.join(words[i:i + step])
+            pieces.append((part, count_tokens(part)))
+
+    chunks = []
+    chunk_tokens = []
+    current = []
+    current_tokens = 0
+    for piece, count in pieces:
+        if current and current_tokens + count > max_tokens:
+            chunks.append(' '.join(current))
+            chunk_tokens.append(current_tokens)
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += count
+
+    if current:
+        chunks.append(' '.join(current))
+        chunk_tokens.append(current_tokens)
+
+    return {
+        'chunks': chunks,
+        'chunk_tokens': chunk_tokens,
+        'chunk_count': len(chunks),
+        'token_count': sum(chunk_tokens)
+    }
@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .models import PDFDocument, ImageDocument
+from .ocr_utils import get_ocr_settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Summaries that record a failure must never be handed to another upload
+FAILED_SUMMARY_MARKERS = (
+    'Summarization failed',
+    'Summarizer not available',
+    'Could not generate summary',
+    'Error generating Gemini summary',
+    'Gemini API could not generate a summary',
+)
+
+# Results copied from an earlier ImageDocument with the same content and settings
+IMAGE_RESULT_FIELDS = [
+    'summary', 'extracted_text', 'labels', 'detected_objects', 'faces_detected',
+    'image_type', 'analysis_confidence', 'analysis_source', 'processing_variant', 'ocr_config',
+    'image_width', 'image_height', 'color_type', 'edge_density', 'text_density',
+    'word_count', 'character_count', 'text_quality', 'classification_data',
+]
+
+
+def _hash_params(params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def pdf_processing_key(summary_type: str, summary_mode: str = 'full') -> str:
+    """Hash of the parameters that determine a PDF's summary"""
+    if summary_type == 'gemini':
+        params = {'summary_type': summary_type, 'model': settings.GEMINI_MODEL}
+    else:
+        params = {'summary_type': summary_type, 'model': settings.SUMMARIZER_MODEL}
+    # Left out for the original mode, backend and decoding so keys of earlier summaries stay valid
+    if summary_mode != 'full':
+        params['summary_mode'] = summary_mode
+        params['token_budget'] = settings.SUMMARY_FAST_TOKEN_BUDGET
+    if summary_type == 'gemini':
+        return _hash_params(params)
+    if settings.SUMMARIZER_BACKEND != 'pytorch':
+        params['backend'] = settings.SUMMARIZER_BACKEND
+    if settings.SUMMARIZER_DECODING != 'sample':
+        params['decoding'] = settings.SUMMARIZER_DECODING
+    return _hash_params(params)
+
+
+def image_processing_key() -> str:
+    """Hash of the OCR and refinement settings that determine an image's analysis"""
+    return _hash_params({'ocr': get_ocr_settings(), 'refine_model': settings.GEMINI_MODEL})
+
+
+def store_content_addressed(uploaded_file, content_hash: str, upload_to: str) -> str:
+    """
+    Store an upload under its content hash so identical files share one copy on disk
+
+    Args:
+        uploaded_file: Django UploadedFile
+        content_hash: SHA-256 of the file contents
+        upload_to: Storage directory, e.g. 'pdfs/'
+
+    Returns:
+        Storage name to assign to the model's file field
+    """
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    name = os.path.join(upload_to, f"{content_hash}{extension}")
+    if default_storage.exists(name):
+        logger.info(f"Reusing stored file {name}")
+        return name
+    uploaded_file.seek(0)
+    name = default_storage.save(name, uploaded_file)
+    uploaded_file.seek(0)
+    return name
+
+
+def _is_usable_summary(text: Optional[str]) -> bool:
+    return bool(text) and not any(marker in text for marker in FAILED_SUMMARY_MARKERS)
+
+
+def _is_degraded(pdf: PDFDocument) -> bool:
+    """True if the tier policy fell back from SUMMARIZER_MODEL to a faster model or an extractive summary"""
+    return pdf.summary_type != 'gemini' and bool(pdf.summary_tier) and pdf.summary_model != settings.SUMMARIZER_MODEL
+
+
+def find_reusable_pdf(content_hash: str, processing_key: str) -> Optional[PDFDocument]:
+    """
+    Find the latest PDF with the same content and processing parameters and a usable summary
+
+    Summaries the tier policy degraded to meet a latency budget are not
+    reused: the processing key stands for SUMMARIZER_MODEL.
+    """
+    candidates = PDFDocument.objects.filter(content_hash=content_hash, processing_key=processing_key)
+    for candidate in candidates.order_by('-uploaded_at')[:5]:
+        summary = candidate.gemini_summary if candidate.summary_type == 'gemini' else candidate.bert_summary
+        if _is_usable_summary(summary) and not _is_degraded(candidate):
+            return candidate
+    return None
+
+
+def copy_pdf_results(source: PDFDocument, target: PDFDocument) -> None:
+    """Copy the summaries and page index of an earlier upload onto a new document"""
+    target.bert_summary = source.bert_summary
+    target.gpt2_summary = source.gpt2_summary
+    target.gemini_summary = source.gemini_summary
+    target.summary_backend = source.summary_backend
+    target.summary_tier = source.summary_tier
+    target.summary_model = source.summary_model
+    target.page_count = source.page_count
+    target.page_offsets = source.page_offsets
+
+
+def find_reusable_image(content_hash: str, processing_key: str) -> Optional[ImageDocument]:
+    """Find the latest image with the same content and OCR settings that was analyzed successfully"""
+    return (ImageDocument.objects
+            .filter(content_hash=content_hash, processing_key=processing_key, status='done')
+            .exclude(analysis_source='error')
+            .order_by('-uploaded_at')
+            .first())
+
+
+def copy_image_results(source: ImageDocument, target: ImageDocument) -> None:
+    """Copy the OCR and analysis results of an earlier upload onto a new document"""
+    for field in IMAGE_RESULT_FIELDS:
+        setattr(target, field, getattr(source, field))
+    # Questions asked about the earlier upload belong to its owner
+    analysis_data = dict(source.analysis_data or {})
+    analysis_data.pop('qa', None)
+    target.analysis_data = analysis_data or None
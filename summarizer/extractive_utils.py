@@ -0,0 +1,165 @@
+import re
+import math
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .chunk_utils import split_sentences
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Above this many sentences the N x N TextRank graph gets too large, and
+# sentences are scored by similarity to the document centroid instead
+TEXTRANK_MAX_SENTENCES = 1500
+
+STOP_WORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers herself him himself his how i if in into is it its itself just me more most my myself no nor not
+now of off on once only or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves also may might
+must shall one two however thus
+""".split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough subword token count (about 1.3 tokens per word) without loading a tokenizer"""
+    return math.ceil(len(text.split()) * 1.3)
+
+
+def _term_matrix(sentences: List[str]):
+    """TF-IDF weights of every (sentence, term) pair as COO arrays, rows L2-normalized"""
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        for word in WORD_PATTERN.findall(sentence.lower()):
+            if word not in STOP_WORDS and len(word) > 1:
+                rows.append(row)
+                cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    if not len(rows):
+        return rows, cols, np.zeros(0), 0
+
+    # Collapse repeated terms within a sentence into term frequencies
+    pairs, counts = np.unique(rows * len(vocabulary) + cols, return_counts=True)
+    rows, cols = pairs // len(vocabulary), pairs % len(vocabulary)
+
+    document_frequency = np.bincount(cols, minlength=len(vocabulary))
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = (1 + np.log(counts)) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights ** 2, minlength=len(sentences)))
+    weights = weights / np.where(norms[rows] > 0, norms[rows], 1)
+    return rows, cols, weights, len(vocabulary)
+
+
+def _textrank_scores(rows, cols, weights, sentence_count: int, term_count: int,
+                     damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    # Terms found in only one sentence add nothing to the similarity between
+    # sentences, so they are dropped before building the dense matrix
+    shared = np.bincount(cols, minlength=term_count) > 1
+    term_index = np.cumsum(shared) - 1
+    keep = shared[cols]
+    matrix = np.zeros((sentence_count, int(shared.sum())), dtype=np.float32)
+    matrix[rows[keep], term_index[cols[keep]]] = weights[keep]
+    similarity = matrix @ matrix.T
+    np.fill_diagonal(similarity, 0)
+
+    # Row-normalize to transition probabilities; isolated sentences link nowhere
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.zeros_like(similarity), where=out_weight > 0)
+
+    scores = np.full(sentence_count, 1.0 / sentence_count, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - damping) / sentence_count + damping * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def _centroid_scores(rows, cols, weights, sentence_count: int, term_count: int) -> np.ndarray:
+    centroid = np.bincount(cols, weights, minlength=term_count) / sentence_count
+    return np.bincount(rows, weights * centroid[cols], minlength=sentence_count)
+
+
+def score_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    Score how central each sentence is to the document
+
+    Sentences are represented as TF-IDF vectors. Up to TEXTRANK_MAX_SENTENCES
+    sentences are ranked with TextRank over their cosine-similarity graph;
+    longer documents use cosine similarity to the document centroid, which
+    needs time and memory linear in the text length.
+
+    Args:
+        sentences: Sentences of one document
+
+    Returns:
+        Array with one score per sentence (higher is more salient)
+    """
+    if not sentences:
+        return np.zeros(0)
+    rows, cols, weights, term_count = _term_matrix(sentences)
+    if not term_count:
+        return np.zeros(len(sentences))
+    if len(sentences) <= TEXTRANK_MAX_SENTENCES:
+        return _textrank_scores(rows, cols, weights, len(sentences), term_count)
+    return _centroid_scores(rows, cols, weights, len(sentences), term_count)
+
+
+def extract_salient_text(text: str, token_budget: int,
+                         count_tokens: Optional[Callable[[str], int]] = None) -> Dict[str, Any]:
+    """
+    Keep the most salient sentences of a text within a token budget
+
+    Args:
+        text: Document text
+        token_budget: Maximum tokens of the extract
+        count_tokens: Token counter (default: estimate_tokens)
+
+    Returns:
+        Dict containing the extract as 'text' (sentences in document order),
+        'sentence_count', 'selected_count' and the extract's 'token_count'
+    """
+    count_tokens = count_tokens or estimate_tokens
+    sentences = split_sentences(text)
+    lengths = [count_tokens(sentence) for sentence in sentences]
+    if sum(lengths) <= token_budget:
+        return {
+            'text': ' '.join(sentences),
+            'sentence_count': len(sentences),
+            'selected_count': len(sentences),
+            'token_count': sum(lengths)
+        }
+
+    scores = score_sentences(sentences)
+    selected = []
+    used = 0
+    for i in np.argsort(-scores, kind='stable'):
+        if used + lengths[i] <= token_budget:
+            selected.append(i)
+            used += lengths[i]
+
+    selected.sort()
+    logger.info(f"Extracted {len(selected)} of {len(sentences)} sentences ({used} tokens)")
+    return {
+        'text': ' '.join(sentences[i] for i in selected),
+        'sentence_count': len(sentences),
+        'selected_count': len(selected),
+        'token_count': used
+    }
+
+
+def prepare_summary_input(text: str, summary_mode: str) -> str:
+    """Reduce the text to its most salient sentences in 'fast' mode; 'full' mode keeps all of it"""
+    if summary_mode != 'fast':
+        return text
+    return extract_salient_text(text, settings.SUMMARY_FAST_TOKEN_BUDGET)['text']
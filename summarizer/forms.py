@@ -4,7 +4,7 @@ from .models import PDFDocument, ImageDocument, UserProfile
 class PDFUploadForm(forms.ModelForm):
     class Meta:
         model = PDFDocument
-        fields = ['file', 'summary_type']
+        fields = ['file', 'summary_type', 'summary_mode']
         widgets = {
             'file': forms.FileInput(attrs={
                 'class': 'form-control',
@@ -15,6 +15,10 @@ class PDFUploadForm(forms.ModelForm):
             'summary_type': forms.Select(attrs={
                 'class': 'form-control',
                 'aria-label': 'Select summary type'
+            }),
+            'summary_mode': forms.Select(attrs={
+                'class': 'form-control',
+                'aria-label': 'Select summary mode'
             })
         }
 
@@ -0,0 +1,321 @@
+import os
+import re
+import json
+import time
+import hashlib
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limited or a transient server error
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Latencies kept for the percentiles in get_stats()
+LATENCY_WINDOW = 500
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` acquisitions per second with bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt with line endings, trailing whitespace and surrounding blank lines normalized"""
+    lines = prompt.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(line.rstrip() for line in lines)).strip()
+
+
+def response_cache_key(model_name: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+    """Cache key of a response: model, normalized prompt and generation config"""
+    params = json.dumps({'model': model_name, 'config': generation_config or {}}, sort_keys=True, default=str)
+    digest = hashlib.sha256(params.encode('utf-8'))
+    digest.update(b'\0' + normalize_prompt(prompt).encode('utf-8'))
+    return f"gemini-response:{digest.hexdigest()}"
+
+
+def _is_retryable(error: Exception) -> bool:
+    # google.api_core errors carry the HTTP status as `code`
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        return True
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError, TimeoutError)):
+        return True
+    return type(error).__name__ in ('DeadlineExceeded', 'ServiceUnavailable', 'ResourceExhausted', 'TooManyRequests')
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini API client
+
+    Every call takes a token from a bucket sized to our requests-per-minute
+    quota, holds one of GEMINI_MAX_CONCURRENCY slots while the request is in
+    flight, times out after GEMINI_TIMEOUT seconds and is retried with
+    exponential backoff and jitter on 429/5xx responses and timeouts.
+    Setting GEMINI_API_ENDPOINT points the client at another server, such as
+    a local stub.
+
+    Text responses to text prompts are stored in the GEMINI_RESPONSE_CACHE
+    cache; a repeated prompt with the same model and generation config is
+    answered from there without using any quota.
+    """
+
+    def __init__(self, model_name: str = None, api_key: str = None, endpoint: str = None,
+                 requests_per_minute: float = None, max_concurrency: int = None, timeout: float = None,
+                 max_retries: int = None):
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
+        self.endpoint = endpoint or settings.GEMINI_API_ENDPOINT
+        self.timeout = timeout or settings.GEMINI_TIMEOUT
+        self.max_retries = settings.GEMINI_MAX_RETRIES if max_retries is None else max_retries
+        max_concurrency = max_concurrency or settings.GEMINI_MAX_CONCURRENCY
+        requests_per_minute = requests_per_minute or settings.GEMINI_REQUESTS_PER_MINUTE
+        self._bucket = TokenBucket(requests_per_minute / 60, settings.GEMINI_BURST)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {
+            'cache_hits': 0, 'cache_misses': 0,
+            'requests': 0, 'failures': 0, 'retries': 0, 'rate_limited': 0, 'in_flight': 0, 'streams': 0,
+            'throttle_seconds': 0.0, 'latency_seconds': 0.0, 'first_token_seconds': 0.0, 'prompt_tokens': 0, 'output_tokens': 0
+        }
+
+    def _get_model(self):
+        with self._model_lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                options = {'api_key': self.api_key}
+                if self.endpoint:
+                    # The REST transport accepts plain http:// endpoints, gRPC does not
+                    options.update(transport='rest', client_options={'api_endpoint': self.endpoint})
+                genai.configure(**options)
+                self._model = genai.GenerativeModel(self.model_name)
+            return self._model
+
+    def _count(self, **amounts):
+        with self._stats_lock:
+            for name, amount in amounts.items():
+                self.stats[name] += amount
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(settings.GEMINI_BACKOFF_MAX, settings.GEMINI_BACKOFF_BASE * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def generate(self, prompt, generation_config: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Generate content for a prompt, respecting the rate limit and concurrency bound
+
+        Args:
+            prompt: Prompt text (or any contents accepted by GenerativeModel.generate_content)
+            generation_config: Optional generation config (temperature, max_output_tokens, ...)
+            timeout: Seconds per attempt (default: GEMINI_TIMEOUT)
+            use_cache: Answer repeated text prompts from the response cache
+
+        Returns:
+            Dict containing the response 'text' ('' when the response has no
+            text, e.g. when it was blocked), 'prompt_tokens', 'output_tokens',
+            'latency' of the successful attempt, the number of 'attempts' (0
+            for a cache hit) and whether the response was 'cached'
+
+        Raises:
+            The last error once retries are exhausted, or any non-retryable error
+        """
+        cache_key = self._cache_key(prompt, generation_config, use_cache)
+        started = time.perf_counter()
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return {**cached, 'latency': time.perf_counter() - started, 'attempts': 0, 'cached': True}
+
+        model = self._get_model()
+        request_options = {'timeout': timeout or self.timeout, 'retry': None}
+        attempt = 0
+        while True:
+            self._count(throttle_seconds=self._bucket.acquire())
+            with self._slots:
+                self._count(requests=1, in_flight=1)
+                started = time.perf_counter()
+                try:
+                    response = model.generate_content(prompt, generation_config=generation_config,
+                                                      request_options=request_options)
+                    error = None
+                except Exception as e:
+                    error = e
+                finally:
+                    latency = time.perf_counter() - started
+                    self._count(in_flight=-1)
+
+            if error is None:
+                break
+            time.sleep(self._retry_delay(error, attempt))
+            attempt += 1
+
+        result = self._finish(response, latency, cache_key)
+        return {**result, 'latency': latency, 'attempts': attempt + 1, 'cached': False}
+
+    def generate_stream(self, prompt, generation_config: Optional[Dict[str, Any]] = None,
+                        timeout: Optional[float] = None, use_cache: bool = True) -> Iterator[str]:
+        """
+        Like generate(), but yield the response text piece by piece as Gemini produces it
+
+        A cached response is yielded in one piece. Failures before the first
+        piece are retried like in generate(); once text has been yielded an
+        error is raised to the caller, since the attempt cannot be resumed.
+        The concurrency slot is held until the stream is exhausted or closed.
+        """
+        cache_key = self._cache_key(prompt, generation_config, use_cache)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            yield cached['text']
+            return
+
+        model = self._get_model()
+        request_options = {'timeout': timeout or self.timeout, 'retry': None}
+        attempt = 0
+        while True:
+            self._count(throttle_seconds=self._bucket.acquire())
+            streamed = False
+            with self._slots:
+                self._count(requests=1, streams=1, in_flight=1)
+                started = time.perf_counter()
+                try:
+                    response = model.generate_content(prompt, generation_config=generation_config, stream=True,
+                                                      request_options=request_options)
+                    for chunk in response:
+                        try:
+                            text = chunk.text
+                        except ValueError:
+                            text = ''
+                        if text:
+                            if not streamed:
+                                self._count(first_token_seconds=time.perf_counter() - started)
+                                streamed = True
+                            yield text
+                    error = None
+                except Exception as e:
+                    error = e
+                finally:
+                    latency = time.perf_counter() - started
+                    self._count(in_flight=-1)
+
+            if error is None:
+                break
+            if streamed:
+                self._count(failures=1)
+                raise error
+            time.sleep(self._retry_delay(error, attempt))
+            attempt += 1
+
+        self._finish(response, latency, cache_key)
+
+    def _cache_key(self, prompt, generation_config, use_cache: bool) -> Optional[str]:
+        if use_cache and settings.GEMINI_RESPONSE_CACHE and isinstance(prompt, str):
+            return response_cache_key(self.model_name, prompt, generation_config)
+        return None
+
+    def _cache_lookup(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        cached = caches[settings.GEMINI_RESPONSE_CACHE].get(cache_key)
+        self._count(**{'cache_hits' if cached is not None else 'cache_misses': 1})
+        return cached
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying a failed attempt; re-raises errors that are not retried"""
+        if getattr(error, 'code', None) == 429:
+            self._count(rate_limited=1)
+        if attempt >= self.max_retries or not _is_retryable(error):
+            self._count(failures=1)
+            raise error
+        delay = self._backoff(attempt)
+        self._count(retries=1)
+        logger.warning(f"Gemini request failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def _finish(self, response, latency: float, cache_key: Optional[str]) -> Dict[str, Any]:
+        """Record a completed response's latency and tokens, cache it, and return its text and token counts"""
+        try:
+            text = response.text or ''
+        except ValueError:
+            # No text part, e.g. the candidate was blocked by safety filters
+            text = ''
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        with self._stats_lock:
+            self.stats['latency_seconds'] += latency
+            self.stats['prompt_tokens'] += prompt_tokens
+            self.stats['output_tokens'] += output_tokens
+            self._latencies.append(latency)
+        result = {'text': text, 'prompt_tokens': prompt_tokens, 'output_tokens': output_tokens}
+        if cache_key and text:
+            caches[settings.GEMINI_RESPONSE_CACHE].set(cache_key, result, settings.GEMINI_RESPONSE_CACHE_TIMEOUT)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Request, retry and token counters plus latency percentiles of recent calls"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            latencies = sorted(self._latencies)
+        lookups = stats['cache_hits'] + stats['cache_misses']
+        stats['cache_hit_ratio'] = round(stats['cache_hits'] / lookups, 3) if lookups else None
+        successes = stats['requests'] - stats['retries'] - stats['failures']
+        stats['mean_latency'] = round(stats['latency_seconds'] / successes, 3) if successes > 0 else None
+        stats['mean_first_token'] = round(stats['first_token_seconds'] / stats['streams'], 3) if stats['streams'] else None
+        stats['p50_latency'] = round(latencies[len(latencies) // 2], 3) if latencies else None
+        stats['p95_latency'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None
+        stats['model'] = self.model_name
+        stats['endpoint'] = self.endpoint
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client() -> GeminiClient:
+    """Get the process-wide Gemini client, creating it on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient()
+        return _client
+
+
+def get_gemini_stats() -> Optional[Dict[str, Any]]:
+    """Stats of the Gemini client, or None if it has not been used in this process"""
+    with _client_lock:
+        client = _client
+    return client.get_stats() if client else None
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from summarizer.models import PDFDocument
+from summarizer.tasks import summarize_pdf_pipeline
+
+# Backfills run after everything else in the bulk queue
+BULK_PRIORITY = 9
+
+
+class Command(BaseCommand):
+    help = 'Queue PDFs without a summary (or whose summarization failed) for summarization on the bulk queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Re-summarize every PDF, e.g. after changing the model')
+        parser.add_argument('--user', help='Only PDFs of this username')
+        parser.add_argument('--limit', type=int, help='Queue at most N PDFs')
+        parser.add_argument('--queue', default='bulk', help='Celery queue to use')
+
+    def handle(self, *args, **options):
+        pdfs = PDFDocument.objects.exclude(status__in=PDFDocument.PROCESSING_STATUSES).order_by('uploaded_at')
+        if not options['all']:
+            missing_bert = Q(summary_type='bert_gpt2') & (Q(bert_summary__isnull=True) | Q(bert_summary=''))
+            missing_gemini = Q(summary_type='gemini') & (Q(gemini_summary__isnull=True) | Q(gemini_summary=''))
+            pdfs = pdfs.filter(Q(status='failed') | missing_bert | missing_gemini)
+        if options['user']:
+            pdfs = pdfs.filter(user__username=options['user'])
+        pending = list(pdfs.values_list('pk', 'status', 'status_message')[:options['limit']])
+
+        queued = 0
+        for pdf_id, status, message in pending:
+            try:
+                summarize_pdf_pipeline(pdf_id, queue=options['queue'], priority=BULK_PRIORITY)
+            except Exception as e:
+                # Undo the 'pending' status set by summarize_pdf_pipeline
+                PDFDocument.objects.filter(pk=pdf_id).update(status=status, progress=100, status_message=message)
+                raise CommandError(f"Queued {queued} of {len(pending)} PDFs, then the broker failed: {e}")
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} PDFs on the {options['queue']} queue"))
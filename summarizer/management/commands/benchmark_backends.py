@@ -0,0 +1,109 @@
+import os
+import re
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summarizer import summarizer_utils
+from summarizer.chunk_utils import chunk_text_by_tokens
+from summarizer.model_registry import BACKENDS
+from summarizer.pdf_utils import extract_text_from_pdf
+
+
+def _tokens(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def _f1(overlap, candidate_len, reference_len):
+    if not overlap:
+        return 0.0
+    precision = overlap / candidate_len
+    recall = overlap / reference_len
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_1(candidate, reference):
+    """ROUGE-1 F1: unigram overlap between two texts"""
+    cand, ref = _tokens(candidate), _tokens(reference)
+    overlap = sum((Counter(cand) & Counter(ref)).values())
+    return _f1(overlap, len(cand), len(ref))
+
+
+def rouge_l(candidate, reference):
+    """ROUGE-L F1: longest common subsequence of tokens"""
+    cand, ref = _tokens(candidate), _tokens(reference)
+    previous = [0] * (len(ref) + 1)
+    for token in cand:
+        current = [0]
+        for j, ref_token in enumerate(ref):
+            current.append(previous[j] + 1 if token == ref_token else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(cand), len(ref))
+
+
+class Command(BaseCommand):
+    help = 'Compare latency and summary quality (ROUGE against fp32 PyTorch) of the CPU inference backends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='PDF or plain-text document to summarize')
+        parser.add_argument('--backends', default=','.join(BACKENDS),
+                            help='Comma-separated backends to compare; the first one is the quality reference')
+        parser.add_argument('--reference', help='Plain-text reference summary to score against instead')
+        parser.add_argument('--max-chunks', type=int, default=8,
+                            help='Only summarize the first N chunks to bound the run time')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"Document not found: {path}")
+        backends = [b.strip() for b in options['backends'].split(',') if b.strip()]
+        unknown = set(backends) - set(BACKENDS)
+        if unknown:
+            raise CommandError(f"Unknown backends: {', '.join(sorted(unknown))}")
+
+        if path.lower().endswith('.pdf'):
+            text = extract_text_from_pdf(path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+
+        reference = None
+        if options['reference']:
+            with open(options['reference'], encoding='utf-8') as f:
+                reference = f.read()
+
+        # Greedy decoding so differences come from the backend, not from sampling;
+        # no summary cache so every backend really runs
+        params = {'max_length': 150, 'min_length': 50, 'do_sample': False, 'num_beams': 1,
+                  'use_cache': False, 'micro_batching': False}
+        self.stdout.write(f"{'backend':>8} {'load s':>7} {'seconds':>8} {'s/chunk':>8} {'speedup':>8} {'ROUGE-1':>8} {'ROUGE-L':>8}")
+        baseline = None
+        for backend in backends:
+            started = time.perf_counter()
+            summarizer = summarizer_utils.load_summarizer(backend)
+            load_seconds = time.perf_counter() - started
+            if summarizer is None:
+                error = summarizer_utils.get_model_load_stats(backend)['error']
+                self.stdout.write(self.style.WARNING(f"{backend:>8} could not be loaded: {error}"))
+                continue
+
+            chunked = chunk_text_by_tokens(text, summarizer.tokenizer)
+            chunks = chunked['chunks'][:options['max_chunks']]
+            chunk_tokens = chunked['chunk_tokens'][:options['max_chunks']]
+            if not chunks:
+                raise CommandError('Document contains no text')
+            summarizer_utils.summarize_chunks(chunks[:1], chunk_tokens[:1], batch_size=1, backend=backend, **params)  # warm-up
+
+            started = time.perf_counter()
+            summaries = summarizer_utils.summarize_chunks(chunks, chunk_tokens, backend=backend, **params)
+            elapsed = time.perf_counter() - started
+            summary = ' '.join(s for s in summaries if s)
+
+            if baseline is None:
+                baseline = elapsed
+                reference = reference or summary
+            self.stdout.write(
+                f"{backend:>8} {load_seconds:>7.1f} {elapsed:>8.2f} {elapsed / len(chunks):>8.2f} "
+                f"{baseline / elapsed:>7.2f}x {rouge_1(summary, reference):>8.3f} {rouge_l(summary, reference):>8.3f}"
+            )
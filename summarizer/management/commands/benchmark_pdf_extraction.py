@@ -0,0 +1,67 @@
+import os
+import time
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summarizer.pdf_utils import count_pdf_pages, _extract_serial, _extract_parallel, _get_extraction_pool
+
+
+class Command(BaseCommand):
+    help = 'Compare single-process and multi-process PDF text extraction to find the crossover page count'
+
+    def add_arguments(self, parser):
+        parser.add_argument('pdf_path', help='PDF to benchmark (use a long document, 200+ pages)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes for the parallel path')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per measurement; the median is reported')
+        parser.add_argument('--page-counts', default='8,16,32,64,128,256',
+                            help='Comma-separated page counts to measure (capped at the document length)')
+
+    def handle(self, *args, **options):
+        pdf_path = options['pdf_path']
+        if not os.path.exists(pdf_path):
+            raise CommandError(f"PDF not found: {pdf_path}")
+
+        workers = options['workers']
+        repeat = max(1, options['repeat'])
+        total_pages = count_pdf_pages(pdf_path)
+        page_counts = sorted({min(int(n), total_pages) for n in options['page_counts'].split(',') if n.strip()})
+
+        # Start the pool up front so process spawn time is not charged to the first row
+        pool = _get_extraction_pool(workers)
+        list(pool.map(abs, range(workers)))
+
+        self.stdout.write(f"{pdf_path}: {total_pages} pages, {workers} workers, median of {repeat} runs")
+        self.stdout.write(f"{'pages':>6} {'serial (s)':>11} {'parallel (s)':>13} {'speedup':>8}")
+
+        speedups = []
+        for page_count in page_counts:
+            serial = self._time(lambda: _extract_serial(pdf_path, page_count), repeat)
+            parallel = self._time(lambda: _extract_parallel(pdf_path, page_count, workers), repeat)
+            speedup = serial / parallel if parallel else 0.0
+            speedups.append((page_count, speedup))
+            self.stdout.write(f"{page_count:>6} {serial:>11.3f} {parallel:>13.3f} {speedup:>7.2f}x")
+
+        # The crossover is the smallest page count from which parallel stays ahead
+        crossover = None
+        for page_count, speedup in reversed(speedups):
+            if speedup <= 1.0:
+                break
+            crossover = page_count
+
+        if crossover is None:
+            self.stdout.write(self.style.WARNING('Parallel extraction was not faster at any measured page count'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Parallel extraction wins from about {crossover} pages; set PDF_PARALLEL_MIN_PAGES accordingly"
+            ))
+
+    def _time(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
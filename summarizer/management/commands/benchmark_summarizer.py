@@ -0,0 +1,63 @@
+import os
+import time
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summarizer import summarizer_utils
+from summarizer.chunk_utils import chunk_text_by_tokens
+from summarizer.pdf_utils import extract_text_from_pdf
+
+
+class Command(BaseCommand):
+    help = 'Compare summarization throughput for different chunk batch sizes on one long document'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='PDF or plain-text document to summarize')
+        parser.add_argument('--batch-sizes', default='1,2,4,8',
+                            help='Comma-separated batch sizes to measure')
+        parser.add_argument('--max-chunks', type=int, default=16,
+                            help='Only summarize the first N chunks to bound the run time')
+        parser.add_argument('--repeat', type=int, default=1,
+                            help='Runs per batch size; the median is reported')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"Document not found: {path}")
+        summarizer = summarizer_utils.get_summarizer()
+        if summarizer is None:
+            raise CommandError('Summarization model is not available')
+
+        if path.lower().endswith('.pdf'):
+            text = extract_text_from_pdf(path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+
+        chunked = chunk_text_by_tokens(text, summarizer.tokenizer)
+        chunks = chunked['chunks'][:options['max_chunks']]
+        chunk_tokens = chunked['chunk_tokens'][:options['max_chunks']]
+        if not chunks:
+            raise CommandError('Document contains no text')
+
+        # Deterministic decoding so every batch size does the same work; no
+        # summary cache or micro-batcher so every run really hits the model
+        params = {'max_length': 150, 'min_length': 50, 'do_sample': False, 'num_beams': 1,
+                  'use_cache': False, 'micro_batching': False}
+        summarizer_utils.summarize_chunks(chunks[:1], chunk_tokens[:1], batch_size=1, **params)  # warm-up
+
+        self.stdout.write(f"{len(chunks)} chunks, {sum(chunk_tokens)} input tokens")
+        self.stdout.write(f"{'batch':>6} {'seconds':>9} {'chunks/s':>9} {'speedup':>8}")
+        baseline = None
+        for batch_size in [int(b) for b in options['batch_sizes'].split(',') if b.strip()]:
+            timings = []
+            for _ in range(max(1, options['repeat'])):
+                started = time.perf_counter()
+                summarizer_utils.summarize_chunks(chunks, chunk_tokens, batch_size=batch_size, **params)
+                timings.append(time.perf_counter() - started)
+            elapsed = statistics.median(timings)
+            baseline = baseline or elapsed
+            self.stdout.write(
+                f"{batch_size:>6} {elapsed:>9.2f} {len(chunks) / elapsed:>9.2f} {baseline / elapsed:>7.2f}x"
+            )
@@ -0,0 +1,95 @@
+import os
+import time
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from summarizer import summarizer_utils
+from summarizer.chunk_utils import chunk_text_by_tokens
+from summarizer.pdf_utils import extract_text_from_pdf
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and latency of concurrent chunk requests with and without micro-batching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='PDF or plain-text document whose chunks are used as requests')
+        parser.add_argument('--concurrency', default='8,16,32',
+                            help='Comma-separated numbers of concurrent clients to measure')
+        parser.add_argument('--requests', type=int, default=4,
+                            help='Chunk requests sent by each client, one after the other')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"Document not found: {path}")
+        summarizer = summarizer_utils.get_summarizer()
+        if summarizer is None:
+            raise CommandError('Summarization model is not available')
+
+        if path.lower().endswith('.pdf'):
+            text = extract_text_from_pdf(path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+
+        chunked = chunk_text_by_tokens(text, summarizer.tokenizer)
+        chunks, chunk_tokens = chunked['chunks'], chunked['chunk_tokens']
+        if not chunks:
+            raise CommandError('Document contains no text')
+
+        # Deterministic decoding and no summary cache so every request hits the model
+        params = {'max_length': 150, 'min_length': 50, 'do_sample': False, 'num_beams': 1, 'use_cache': False}
+        summarizer_utils.summarize_chunks(chunks[:1], chunk_tokens[:1], micro_batching=False, **params)  # warm-up
+
+        self.stdout.write(f"{len(chunks)} distinct chunks, {options['requests']} requests per client")
+        self.stdout.write(f"{'clients':>7} {'mode':>8} {'chunks/s':>9} {'p50 s':>7} {'p95 s':>7} {'batch':>6}")
+        for concurrency in [int(c) for c in options['concurrency'].split(',') if c.strip()]:
+            for micro_batching in (False, True):
+                result = self._run(chunks, chunk_tokens, concurrency, options['requests'], micro_batching, params)
+                mode = 'batched' if micro_batching else 'direct'
+                self.stdout.write(
+                    f"{concurrency:>7} {mode:>8} {result['throughput']:>9.2f} {result['p50']:>7.2f} "
+                    f"{result['p95']:>7.2f} {result['mean_batch_size']:>6.2f}"
+                )
+
+    def _run(self, chunks, chunk_tokens, concurrency, requests, micro_batching, params):
+        # Without the micro-batcher the model serves one request at a time, as
+        # the single-worker model server does
+        model_lock = threading.Lock()
+        batcher = summarizer_utils.get_batcher()
+        before = batcher.get_stats()
+
+        def client(n):
+            latencies = []
+            for r in range(requests):
+                i = (n * requests + r) % len(chunks)
+                started = time.perf_counter()
+                if micro_batching:
+                    summarizer_utils.summarize_chunks([chunks[i]], [chunk_tokens[i]], micro_batching=True, **params)
+                else:
+                    with model_lock:
+                        summarizer_utils.summarize_chunks([chunks[i]], [chunk_tokens[i]], micro_batching=False, **params)
+                latencies.append(time.perf_counter() - started)
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = [latency for result in pool.map(client, range(concurrency)) for latency in result]
+        elapsed = time.perf_counter() - started
+
+        after = batcher.get_stats()
+        batches = after['batches'] - before['batches']
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': _percentile(latencies, 0.95),
+            'mean_batch_size': (after['items'] - before['items']) / batches if batches else 1.0
+        }
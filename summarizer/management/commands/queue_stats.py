@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pdf_summarizer.celery import app
+from summarizer.queue_utils import get_queue_stats, reset_queue_waits
+
+
+def _seconds(value):
+    return f"{value:.2f}" if value is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Show the depth and wait times of every Celery queue, to size its worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--watch', type=float, metavar='SECONDS',
+                            help='Print again every SECONDS until interrupted')
+        parser.add_argument('--reset', action='store_true', help='Clear the recorded wait times first')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            reset_queue_waits()
+        while True:
+            self.stdout.write(f"{'queue':>12} {'depth':>6} {'tasks':>7} {'mean s':>7} {'p50 s':>7} {'p95 s':>7} {'max s':>7}")
+            for queue, stats in get_queue_stats(app).items():
+                depth = stats['depth'] if stats['depth'] is not None else '?'
+                self.stdout.write(
+                    f"{queue:>12} {depth:>6} {stats['tasks']:>7} {_seconds(stats['mean_wait']):>7} "
+                    f"{_seconds(stats['p50_wait']):>7} {_seconds(stats['p95_wait']):>7} {_seconds(stats['max_wait']):>7}"
+                )
+            if not options['watch']:
+                return
+            time.sleep(options['watch'])
+            self.stdout.write('')
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from summarizer import summarizer_utils
+from summarizer.model_server import ModelServer
+
+
+class Command(BaseCommand):
+    help = 'Run the shared summarization model server that web and Celery workers connect to via MODEL_SERVER_URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.MODEL_SERVER_HOST)
+        parser.add_argument('--port', type=int, default=settings.MODEL_SERVER_PORT)
+        parser.add_argument('--queue-size', type=int, default=settings.MODEL_SERVER_QUEUE_SIZE,
+                            help='Requests allowed to wait for the model before new ones get 503')
+        parser.add_argument('--workers', type=int, default=settings.MODEL_SERVER_WORKERS,
+                            help='Documents summarized concurrently (needs SUMMARIZER_MICRO_BATCHING)')
+
+    def handle(self, *args, **options):
+        # This process is the server; never forward requests to another one
+        settings.MODEL_SERVER_URL = None
+        self.stdout.write(f"Loading {settings.SUMMARIZER_MODEL}...")
+        if summarizer_utils.load_summarizer() is None:
+            raise CommandError('Could not load the summarization model')
+
+        # Without the micro-batcher concurrent workers would call the model from several threads
+        workers = options['workers'] if settings.SUMMARIZER_MICRO_BATCHING else 1
+        server = ModelServer(options['host'], options['port'], options['queue_size'], workers)
+        self.stdout.write(self.style.SUCCESS(
+            f"Model server ready on http://{options['host']}:{options['port']} (Ctrl+C to stop)"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write('Shutting down model server')
+        finally:
+            server.shutdown()
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from summarizer import summarizer_utils
+
+
+class Command(BaseCommand):
+    help = 'Load the summarization models now and report how long it took'
+
+    def handle(self, *args, **options):
+        if settings.MODEL_SERVER_URL:
+            self.stdout.write(f"Models are served by {settings.MODEL_SERVER_URL}; checking readiness")
+            if not summarizer_utils.is_model_ready():
+                raise CommandError('Model server is not ready')
+            self.stdout.write(self.style.SUCCESS('Model server is ready'))
+            return
+
+        started = time.perf_counter()
+        if not summarizer_utils.warm_up():
+            raise CommandError(f"Could not load {settings.SUMMARIZER_MODEL}: {summarizer_utils.get_model_load_stats()['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Loaded {settings.SUMMARIZER_MODEL} in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,138 @@
+import json
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Combine single-item model calls from concurrent callers into batches
+
+    Callers submit one item at a time and get a Future back. A single worker
+    thread takes the first waiting item, keeps collecting for up to
+    max_wait_ms or until max_batch_size items are waiting, then runs every
+    group of items with the same parameters as one batch and resolves each
+    caller's future. A caller can cap the size of the batches its items run
+    in. The model is only ever called from the worker thread.
+    """
+
+    def __init__(self, run_batch: Callable[[List[Any], Dict[str, Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 5, name: str = 'micro-batcher'):
+        """
+        Args:
+            run_batch: Function taking a list of items and a params dict and
+                returning one result per item (or raising for the whole batch)
+            max_batch_size: Most items run in one call
+            max_wait_ms: Longest time the first item of a batch waits for company
+            name: Name of the worker thread
+        """
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.stats = {'batches': 0, 'items': 0, 'failed': 0, 'wait_seconds': 0.0, 'run_seconds': 0.0}
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any, params: Dict[str, Any] = None, max_batch_size: Optional[int] = None) -> Future:
+        """
+        Queue one item; only items with equal params are batched together
+
+        Args:
+            item: Input of the model call
+            params: Parameters of the model call
+            max_batch_size: Most items in any batch this item runs in
+                (default: the batcher's max_batch_size)
+        """
+        future = Future()
+        params = params or {}
+        limit = max(1, min(max_batch_size or self.max_batch_size, self.max_batch_size))
+        self._queue.put((json.dumps(params, sort_keys=True), params, item, future, time.perf_counter(), limit))
+        return future
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Take whatever else is already waiting, up to a full batch
+        while len(pending) < self.max_batch_size:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            groups: Dict[str, list] = {}
+            for entry in pending:
+                groups.setdefault(entry[0], []).append(entry)
+            for entries in groups.values():
+                # Split so that no batch is larger than any of its items allows
+                batch = []
+                for entry in entries:
+                    if batch and len(batch) + 1 > min(entry[5], *(queued[5] for queued in batch)):
+                        self._run_group(batch)
+                        batch = []
+                    batch.append(entry)
+                self._run_group(batch)
+
+    def _run_group(self, entries):
+        entries = [entry for entry in entries if entry[3].set_running_or_notify_cancel()]
+        if not entries:
+            return
+        started = time.perf_counter()
+        params = entries[0][1]
+        try:
+            results = self.run_batch([entry[2] for entry in entries], params)
+            for entry, result in zip(entries, results):
+                entry[3].set_result(result)
+        except Exception as e:
+            logger.warning(f"Batch of {len(entries)} failed, retrying items individually: {e}")
+            for entry in entries:
+                try:
+                    entry[3].set_result(self.run_batch([entry[2]], params)[0])
+                except Exception as e:
+                    self._count('failed')
+                    entry[3].set_exception(e)
+
+        finished = time.perf_counter()
+        with self._stats_lock:
+            self.stats['batches'] += 1
+            self.stats['items'] += len(entries)
+            self.stats['run_seconds'] += finished - started
+            self.stats['wait_seconds'] += sum(started - entry[4] for entry in entries)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        batches = stats['batches'] or 1
+        items = stats['items'] or 1
+        return {
+            **stats,
+            'mean_batch_size': round(stats['items'] / batches, 2),
+            'mean_wait_ms': round(stats['wait_seconds'] * 1000 / items, 2),
+            'queue_depth': self.queue_depth()
+        }
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0009_imagedocument_analysis_confidence_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='page_count',
+            field=models.IntegerField(default=0, help_text='Number of pages in the PDF'),
+        ),
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='page_offsets',
+            field=models.JSONField(blank=True, help_text='Character offset where each page starts in the extracted text', null=True),
+        ),
+    ]
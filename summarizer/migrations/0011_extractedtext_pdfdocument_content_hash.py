@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0010_pdfdocument_page_count_pdfdocument_page_offsets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the source file', max_length=64, unique=True)),
+                ('compressed_text', models.BinaryField(help_text='zlib-compressed UTF-8 text')),
+                ('page_count', models.IntegerField(default=0)),
+                ('page_offsets', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 of the uploaded file', max_length=64),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0011_extractedtext_pdfdocument_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagedocument',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='SHA-256 of the uploaded file', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='imagedocument',
+            name='processing_key',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Hash of the OCR and refinement settings used', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='processing_key',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Hash of the parameters the summary was produced with', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0012_imagedocument_content_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='summary_backend',
+            field=models.CharField(blank=True, default='', help_text='Inference backend that produced the BART summary', max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0013_pdfdocument_summary_backend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummaryCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chunk_hash', models.CharField(help_text='SHA-256 of the chunk text', max_length=64)),
+                ('model', models.CharField(max_length=255)),
+                ('backend', models.CharField(max_length=20)),
+                ('params_hash', models.CharField(help_text='Hash of the generation parameters', max_length=64)),
+                ('summary', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('chunk_hash', 'model', 'backend', 'params_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0014_summarycache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='summary_mode',
+            field=models.CharField(choices=[('full', 'Full (summarize the whole document)'), ('fast', 'Fast (summarize the key sentences)')], default='full', max_length=10),
+        ),
+    ]
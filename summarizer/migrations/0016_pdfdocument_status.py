@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0015_pdfdocument_summary_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='progress',
+            field=models.PositiveSmallIntegerField(default=100, help_text='Percent of the background pipeline completed'),
+        ),
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Queued'), ('extracting', 'Extracting text'), ('chunking', 'Preparing sections'), ('summarizing', 'Summarizing'), ('done', 'Done'), ('failed', 'Failed')], default='done', help_text='Step of the background summarization pipeline', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='status_message',
+            field=models.CharField(blank=True, default='', help_text='Details of the current step, or the error', max_length=255),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0016_pdfdocument_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagedocument',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('classifying', 'Classifying image'), ('ocr', 'Extracting text'), ('refining', 'Refining summary'), ('done', 'Done'), ('failed', 'Failed')], default='done', help_text='Step of the background OCR pipeline', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='imagedocument',
+            name='status_message',
+            field=models.CharField(blank=True, default='', help_text='Details of the current step, or the error', max_length=255),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('summarizer', '0017_imagedocument_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='summary_model',
+            field=models.CharField(blank=True, default='', help_text='Model that produced the BART summary (empty if extractive)', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='pdfdocument',
+            name='summary_tier',
+            field=models.CharField(blank=True, default='', help_text='Model tier the tier policy chose for the BART summary', max_length=50),
+        ),
+    ]
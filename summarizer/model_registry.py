@@ -0,0 +1,225 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Inference backends for seq2seq models on CPU
+BACKENDS = ('pytorch', 'int8', 'onnx')
+
+
+def _estimate_model_bytes(pipe) -> int:
+    """Approximate resident size of a pipeline from its weights"""
+    model = getattr(pipe, 'model', None)
+    if model is None:
+        return 0
+    if not hasattr(model, 'state_dict'):
+        # ONNX Runtime models: the exported graphs hold the weights
+        model_dir = getattr(model, 'model_save_dir', None)
+        if not model_dir or not os.path.isdir(model_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(model_dir, name))
+                   for name in os.listdir(model_dir) if name.endswith(('.onnx', '.onnx_data')))
+    # state_dict includes the packed weights of dynamically quantized layers
+    size = 0
+    for value in model.state_dict().values():
+        tensors = value if isinstance(value, tuple) else (value,)
+        size += sum(t.numel() * t.element_size() for t in tensors if hasattr(t, 'element_size'))
+    return size
+
+
+def _estimate_checkpoint_bytes(model: str, dtype: str, backend: str) -> int:
+    """Approximate size of a model before loading it, from its weight files on disk"""
+    names = ('model.safetensors', 'pytorch_model.bin')
+    if os.path.isdir(model):
+        paths = [os.path.join(model, name) for name in names]
+    else:
+        try:
+            from huggingface_hub import try_to_load_from_cache
+        except ImportError:
+            return 0
+        paths = [try_to_load_from_cache(model, name) for name in names]
+    for path in paths:
+        if isinstance(path, str) and os.path.isfile(path):
+            size = os.path.getsize(path)
+            # Checkpoints are float32; int8 and ONNX load the float32 model first
+            if backend == 'pytorch' and dtype in ('float16', 'bfloat16'):
+                size //= 2
+            return size
+    return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded Hugging Face pipelines
+
+    Pipelines are keyed by (task, model, dtype, backend) and kept in
+    least-recently-used order. Before a model loads, the least recently used
+    models are dropped until its size (as last loaded, else estimated from
+    its checkpoint) fits in the memory budget. Concurrent requests for the same
+    model wait for a single load instead of loading it twice. A model that
+    failed to load is not retried until MODEL_REGISTRY_RETRY_SECONDS have
+    passed.
+    """
+
+    def __init__(self, max_memory_mb: Optional[int] = None):
+        self.max_memory_mb = max_memory_mb
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str, str, str], threading.Lock] = {}
+        # key -> (error, time.monotonic() of the failed load)
+        self._failures: Dict[Tuple[str, str, str, str], Tuple[str, float]] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'loads': 0, 'evictions': 0, 'load_seconds': 0.0}
+        self.load_times: Dict[str, float] = {}
+        # Measured size of every model loaded so far, kept after eviction
+        self._sizes: Dict[Tuple[str, str, str, str], int] = {}
+
+    @property
+    def budget_bytes(self) -> int:
+        max_memory_mb = self.max_memory_mb
+        if max_memory_mb is None:
+            max_memory_mb = getattr(settings, 'MODEL_REGISTRY_MAX_MEMORY_MB', 4096)
+        return int(max_memory_mb * 1024 * 1024)
+
+    def _in_backoff(self, key) -> bool:
+        failure = self._failures.get(key)
+        if failure is None:
+            return False
+        retry_seconds = getattr(settings, 'MODEL_REGISTRY_RETRY_SECONDS', 300)
+        return time.monotonic() - failure[1] < retry_seconds
+
+    def get(self, task: str, model: str, dtype: str = 'float32', backend: str = 'pytorch',
+            retry_failed: bool = False):
+        """
+        Get a loaded pipeline, loading it on first use
+
+        Args:
+            task: Pipeline task, e.g. 'summarization'
+            model: Model id, e.g. 'facebook/bart-large-cnn'
+            dtype: Weight dtype ('float32', 'float16' or 'bfloat16'); only used
+                by the 'pytorch' backend
+            backend: 'pytorch', 'int8' (dynamically quantized Linear layers)
+                or 'onnx' (exported graph run by ONNX Runtime, needs optimum)
+            retry_failed: Try again even if an earlier load of this model
+                failed less than MODEL_REGISTRY_RETRY_SECONDS ago
+
+        Returns:
+            The pipeline, or None if it could not be loaded
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown inference backend {backend!r}, expected one of {BACKENDS}")
+        key = (task, model, dtype, backend)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._models[key][0]
+            if not retry_failed and self._in_backoff(key):
+                return None
+            self.stats['misses'] += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+            return self._load(key)
+
+    def _load(self, key):
+        task, model, dtype, backend = key
+        expected = self._sizes.get(key) or _estimate_checkpoint_bytes(model, dtype, backend)
+        with self._lock:
+            self._evict_to_fit(expected)
+        started = time.perf_counter()
+        try:
+            pipe = self._build_pipeline(task, model, dtype, backend)
+        except Exception as e:
+            logger.warning(f"Could not load {model} for {task}: {str(e)}")
+            with self._lock:
+                self._failures[key] = (str(e), time.monotonic())
+            return None
+
+        elapsed = time.perf_counter() - started
+        size = _estimate_model_bytes(pipe)
+        with self._lock:
+            self._failures.pop(key, None)
+            self._sizes[key] = size
+            # The estimate can be low, and other models may have loaded meanwhile
+            self._evict_to_fit(size)
+            self._models[key] = (pipe, size)
+            self.stats['loads'] += 1
+            self.stats['load_seconds'] += elapsed
+            self.load_times['/'.join(key)] = round(elapsed, 3)
+        logger.info(f"Loaded {model} ({backend}, {dtype}, {size / 2 ** 20:.0f} MB) in {elapsed:.1f}s")
+        return pipe
+
+    def _build_pipeline(self, task, model, dtype, backend):
+        from transformers import pipeline
+        from .torch_patch import apply_torch_patch
+
+        apply_torch_patch()
+        if backend == 'onnx':
+            # Optional dependency: pip install optimum[onnxruntime]
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+            from transformers import AutoTokenizer
+            ort_model = ORTModelForSeq2SeqLM.from_pretrained(model, export=True)
+            return pipeline(task, model=ort_model, tokenizer=AutoTokenizer.from_pretrained(model))
+
+        import torch
+        kwargs = {}
+        if dtype != 'float32' and backend == 'pytorch':
+            kwargs['torch_dtype'] = getattr(torch, dtype)
+        pipe = pipeline(task, model=model, **kwargs)
+        if backend == 'int8':
+            # int8 weights for every Linear layer, activations quantized on the fly
+            pipe.model = torch.quantization.quantize_dynamic(pipe.model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipe
+
+    def _evict_to_fit(self, incoming: int):
+        budget = self.budget_bytes
+        while self._models and self.memory_bytes() + incoming > budget:
+            evicted, (_, size) = self._models.popitem(last=False)
+            self.stats['evictions'] += 1
+            logger.info(f"Evicted {evicted[1]} ({size / 2 ** 20:.0f} MB) to stay within the model memory budget")
+        if incoming > budget:
+            logger.warning(f"A single model ({incoming / 2 ** 20:.0f} MB) exceeds MODEL_REGISTRY_MAX_MEMORY_MB")
+
+    def memory_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def is_loaded(self, task: str, model: str, dtype: str = 'float32', backend: str = 'pytorch') -> bool:
+        return (task, model, dtype, backend) in self._models
+
+    def last_error(self, task: str, model: str, dtype: str = 'float32', backend: str = 'pytorch') -> Optional[str]:
+        failure = self._failures.get((task, model, dtype, backend))
+        return failure[0] if failure else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else None,
+                'loaded': ['/'.join(key) for key in self._models],
+                'memory_mb': round(self.memory_bytes() / 2 ** 20, 1),
+                'budget_mb': round(self.budget_bytes / 2 ** 20, 1),
+                'load_times': dict(self.load_times)
+            }
+
+
+# Every summarization entry point goes through this registry
+registry = ModelRegistry()
+
+
+def get_pipeline(task: str, model: str, dtype: str = 'float32', backend: str = 'pytorch',
+                 retry_failed: bool = False):
+    """Get a pipeline from the process-wide model registry"""
+    return registry.get(task, model, dtype, backend, retry_failed=retry_failed)
@@ -0,0 +1,151 @@
+import json
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from django.conf import settings
+
+from . import summarizer_utils
+from .cache_utils import get_summary_cache_stats
+from .model_registry import registry
+from .tier_utils import get_tier_stats
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class ModelServer:
+    """
+    Long-lived process that owns the summarization model
+
+    HTTP handler threads only parse requests and put them on a bounded queue;
+    worker threads take requests off the queue and summarize them. With one
+    worker, the model is never used by two requests at a time; with several
+    (micro-batching only), their chunks meet in the model's MicroBatcher,
+    whose single thread runs them in shared batches.
+    """
+
+    def __init__(self, host: str, port: int, queue_size: int = 32, workers: int = 1):
+        self.requests = queue.Queue(maxsize=queue_size)
+        self.httpd = ThreadingHTTPServer((host, port), SummarizationRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.model_server = self
+        self.stats = {'processed': 0, 'failed': 0, 'rejected': 0, 'busy_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._run_inference, name=f'model-server-worker-{n}', daemon=True)
+            for n in range(max(1, workers))
+        ]
+
+    def submit(self, payload: Dict[str, Any]) -> Future:
+        """Queue a summarization request; raises queue.Full when the server is saturated"""
+        future = Future()
+        try:
+            self.requests.put_nowait((payload, future))
+        except queue.Full:
+            self._count('rejected')
+            raise
+        return future
+
+    def _run_inference(self):
+        while True:
+            payload, future = self.requests.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.perf_counter()
+            try:
+                future.set_result(summarizer_utils.summarize_locally(
+                    payload['text'],
+                    max_length=payload.get('max_length') or 150,
+                    min_length=payload.get('min_length') or 50,
+                    batch_size=payload.get('batch_size'),
+                    target_length=payload.get('target_length'),
+                    latency_budget=payload.get('latency_budget')
+                ))
+                self._count('processed')
+            except Exception as e:
+                self._count('failed')
+                future.set_exception(e)
+            finally:
+                self._count('busy_seconds', time.perf_counter() - started)
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            'status': 'ok' if summarizer_utils.is_model_ready() else 'unavailable',
+            'model': settings.SUMMARIZER_MODEL,
+            'backend': settings.SUMMARIZER_BACKEND,
+            'load_seconds': summarizer_utils.get_model_load_stats()['load_seconds'],
+            'registry': registry.get_stats(),
+            'summary_cache': get_summary_cache_stats(),
+            'tiers': get_tier_stats(),
+            'batchers': summarizer_utils.get_batcher_stats(),
+            'workers': len(self._workers),
+            'queue_depth': self.requests.qsize(),
+            **dict(self.stats)
+        }
+
+    def serve_forever(self):
+        for worker in self._workers:
+            worker.start()
+        host, port = self.httpd.server_address[:2]
+        logger.info(f"Model server listening on http://{host}:{port}")
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SummarizationRequestHandler(BaseHTTPRequestHandler):
+    """POST /summarize runs a summarization; GET /health reports status and queue depth"""
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send_json({'error': 'Not found'}, 404)
+        health = self.server.model_server.health()
+        self._send_json(health, 200 if health['status'] == 'ok' else 503)
+
+    def do_POST(self):
+        if self.path != '/summarize':
+            return self._send_json({'error': 'Not found'}, 404)
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except (ValueError, json.JSONDecodeError):
+            return self._send_json({'error': 'Invalid JSON'}, 400)
+        if not isinstance(payload.get('text'), str):
+            return self._send_json({'error': 'text is required'}, 400)
+
+        try:
+            future = self.server.model_server.submit(payload)
+        except queue.Full:
+            return self._send_json({'error': 'Model server is busy, try again later'}, 503)
+
+        try:
+            result = future.result(timeout=settings.MODEL_SERVER_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            return self._send_json({'error': 'Summarization timed out'}, 504)
+        except Exception as e:
+            logger.exception(f"Summarization failed: {str(e)}")
+            return self._send_json({'error': str(e)}, 500)
+        self._send_json(result)
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
@@ -21,6 +21,21 @@ class PDFDocument(models.Model):
         ('gemini', 'Google Gemini')
     ]
     
+    SUMMARY_MODE_CHOICES = [
+        ('full', 'Full (summarize the whole document)'),
+        ('fast', 'Fast (summarize the key sentences)')
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Queued'),
+        ('extracting', 'Extracting text'),
+        ('chunking', 'Preparing sections'),
+        ('summarizing', 'Summarizing'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ]
+    PROCESSING_STATUSES = ('pending', 'extracting', 'chunking', 'summarizing')
+    
     LANGUAGE_CHOICES = [
         # English
         ('en', 'English'),
@@ -63,6 +78,7 @@ class PDFDocument(models.Model):
     file = models.FileField(upload_to='pdfs/')
     uploaded_at = models.DateTimeField(default=timezone.now)
     summary_type = models.CharField(max_length=20, choices=SUMMARY_CHOICES, default='bert_gpt2')
+    summary_mode = models.CharField(max_length=10, choices=SUMMARY_MODE_CHOICES, default='full')
     bert_summary = models.TextField(blank=True, null=True)
     gpt2_summary = models.TextField(blank=True, null=True)
     gemini_summary = models.TextField(blank=True, null=True)
@@ -70,14 +86,72 @@ class PDFDocument(models.Model):
     translated_summary = models.TextField(blank=True, null=True)
     questions = models.TextField(blank=True, null=True, help_text='User questions related to the PDF')
     answers = models.TextField(blank=True, null=True, help_text='Answers to user questions related to the PDF')
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True, help_text='SHA-256 of the uploaded file')
+    processing_key = models.CharField(max_length=64, blank=True, default='', db_index=True, help_text='Hash of the parameters the summary was produced with')
+    page_count = models.IntegerField(default=0, help_text='Number of pages in the PDF')
+    page_offsets = models.JSONField(blank=True, null=True, help_text='Character offset where each page starts in the extracted text')
+    summary_backend = models.CharField(max_length=20, blank=True, default='', help_text='Inference backend that produced the BART summary')
+    summary_tier = models.CharField(max_length=50, blank=True, default='', help_text='Model tier the tier policy chose for the BART summary')
+    summary_model = models.CharField(max_length=200, blank=True, default='', help_text='Model that produced the BART summary (empty if extractive)')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='done', help_text='Step of the background summarization pipeline')
+    progress = models.PositiveSmallIntegerField(default=100, help_text='Percent of the background pipeline completed')
+    status_message = models.CharField(max_length=255, blank=True, default='', help_text='Details of the current step, or the error')
 
     def __str__(self):
         return self.title
 
+    @property
+    def is_processing(self):
+        return self.status in self.PROCESSING_STATUSES
+
+    def get_page_span(self, page_number, text_length):
+        """Get the (start, end) span of a page inside the extracted text"""
+        from .pdf_utils import get_page_span
+        return get_page_span(self.page_offsets or [], page_number, text_length)
+
+    def get_extracted_text(self):
+        """Get the extracted text from the content-hash store, extracting it only once"""
+        from .cache_utils import get_or_extract_pdf_text
+        extracted = get_or_extract_pdf_text(self.file, self.content_hash or None)
+        if self.pk and (self.content_hash != extracted['content_hash'] or not self.page_offsets):
+            self.content_hash = extracted['content_hash']
+            self.page_count = extracted['page_count']
+            self.page_offsets = extracted['page_offsets']
+            self.save(update_fields=['content_hash', 'page_count', 'page_offsets'])
+        return extracted['text']
+
     class Meta:
         ordering = ['-uploaded_at']
 
 
+class SummaryCache(models.Model):
+    """Summary of one chunk, reused wherever the same chunk is summarized with the same model and settings"""
+    chunk_hash = models.CharField(max_length=64, help_text='SHA-256 of the chunk text')
+    model = models.CharField(max_length=255)
+    backend = models.CharField(max_length=20)
+    params_hash = models.CharField(max_length=64, help_text='Hash of the generation parameters')
+    summary = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model} {self.chunk_hash[:12]}"
+
+    class Meta:
+        unique_together = ('chunk_hash', 'model', 'backend', 'params_hash')
+
+
+class ExtractedText(models.Model):
+    """Normalized text extracted from a PDF, stored once per distinct file content"""
+    content_hash = models.CharField(max_length=64, unique=True, help_text='SHA-256 of the source file')
+    compressed_text = models.BinaryField(help_text='zlib-compressed UTF-8 text')
+    page_count = models.IntegerField(default=0)
+    page_offsets = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content_hash
+
+
 class ImageDocument(models.Model):
     ANALYSIS_SOURCE_CHOICES = [
         ('google_vision', 'Google Cloud Vision'),
@@ -94,11 +168,25 @@ class ImageDocument(models.Model):
         ('banner_or_poster', 'Banner/Poster'),
         ('unknown', 'Unknown')
     ]
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('classifying', 'Classifying image'),
+        ('ocr', 'Extracting text'),
+        ('refining', 'Refining summary'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ]
+    PROCESSING_STATUSES = ('queued', 'classifying', 'ocr', 'refining')
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='images')
     title = models.CharField(max_length=255)
     image = models.ImageField(upload_to='images/')
     uploaded_at = models.DateTimeField(default=timezone.now)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True, help_text='SHA-256 of the uploaded file')
+    processing_key = models.CharField(max_length=64, blank=True, default='', db_index=True, help_text='Hash of the OCR and refinement settings used')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='done', help_text='Step of the background OCR pipeline')
+    status_message = models.CharField(max_length=255, blank=True, default='', help_text='Details of the current step, or the error')
     
     # Text extraction results
     summary = models.TextField(blank=True, null=True, help_text='Comprehensive image summary')
@@ -149,6 +237,10 @@ class ImageDocument(models.Model):
     class Meta:
         ordering = ['-uploaded_at']
     
+    @property
+    def is_processing(self):
+        return self.status in self.PROCESSING_STATUSES
+    
     def get_analysis_summary(self):
         """Get a human-readable summary of the analysis"""
         summary_parts = []
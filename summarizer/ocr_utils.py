@@ -13,7 +13,7 @@ except Exception:
 from django.conf import settings
 import re
 import json
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -30,6 +30,29 @@ except Exception:
     logger.info('Google Cloud Vision initialization failed. Using Tesseract OCR.')
     vision_client = None
 
+# OCR pipeline settings (part of the deduplication key for image uploads)
+MAX_IMAGE_DIMENSION = 1600
+MAX_ENHANCED_VARIANTS = 4
+EARLY_EXIT_QUALITY = 0.75
+
+def get_ocr_settings(image_type: str = 'auto') -> Dict[str, Any]:
+    """
+    Describe the OCR settings an image would be processed with
+    
+    Args:
+        image_type: Type of image passed to extract_text_from_image
+        
+    Returns:
+        Dict of the settings that influence OCR results
+    """
+    return {
+        'image_type': image_type,
+        'vision_api': vision_client is not None,
+        'max_dimension': MAX_IMAGE_DIMENSION,
+        'max_variants': MAX_ENHANCED_VARIANTS,
+        'early_exit_quality': EARLY_EXIT_QUALITY
+    }
+
 def enhance_image_quality(image: Image.Image, enhancement_type: str = 'auto') -> Tuple[Image.Image, List[Image.Image]]:
     """
     Enhanced image preprocessing with multiple techniques for better OCR results
@@ -44,7 +67,7 @@ def enhance_image_quality(image: Image.Image, enhancement_type: str = 'auto') ->
     try:
         # Convert PIL image to OpenCV format
         # Downscale very large images to speed up processing (keep aspect ratio)
-        max_dim = 1600
+        max_dim = MAX_IMAGE_DIMENSION
         if max(image.size) > max_dim:
             scale = max_dim / float(max(image.size))
             new_size = (int(image.size[0] * scale), int(image.size[1] * scale))
@@ -106,7 +129,7 @@ def enhance_image_quality(image: Image.Image, enhancement_type: str = 'auto') ->
         processed_images.append(('median_blur', Image.fromarray(median_thresh)))
 
         # Limit number of variants to speed up processing
-        processed_images = processed_images[:4]
+        processed_images = processed_images[:MAX_ENHANCED_VARIANTS]
         
         # Return the first processed image as default, along with all variants
         return processed_images[0][1], [img for _, img in processed_images]
@@ -115,7 +138,7 @@ def enhance_image_quality(image: Image.Image, enhancement_type: str = 'auto') ->
         logger.warning(f"Image enhancement failed: {str(e)}. Using original image.")
         return image, [image]
 
-def classify_image_content(image: Image.Image) -> Dict[str, any]:
+def classify_image_content(image: Image.Image) -> Dict[str, Any]:
     """
     Advanced image classification to determine content type and processing strategy
     
@@ -204,7 +227,7 @@ def classify_image_content(image: Image.Image) -> Dict[str, any]:
             'error': str(e)
         }
 
-def extract_text_with_multiple_techniques(image: Image.Image, classification: Dict) -> Dict[str, any]:
+def extract_text_with_multiple_techniques(image: Image.Image, classification: Dict) -> Dict[str, Any]:
     """
     Extract text using multiple OCR techniques and preprocessing methods
     
@@ -284,7 +307,7 @@ def extract_text_with_multiple_techniques(image: Image.Image, classification: Di
                         }
 
                     # Early exit if quality is already good enough
-                    if best_result['confidence'] >= 0.75:
+                    if best_result['confidence'] >= EARLY_EXIT_QUALITY:
                         return best_result
                         
                 except Exception as e:
@@ -352,7 +375,7 @@ def calculate_text_quality(text: str) -> float:
     
     return max(0.0, min(1.0, quality_score))
 
-def generate_comprehensive_image_summary(image: Image.Image, extracted_text: str, classification: Dict) -> Dict[str, any]:
+def generate_comprehensive_image_summary(image: Image.Image, extracted_text: str, classification: Dict) -> Dict[str, Any]:
     """
     Generate a comprehensive summary of the image content
     
@@ -476,7 +499,7 @@ def generate_comprehensive_image_summary(image: Image.Image, extracted_text: str
             'error': str(e)
         }
 
-def analyze_image_with_vision_api(image: Image.Image) -> Dict[str, any]:
+def analyze_image_with_vision_api(image: Image.Image) -> Dict[str, Any]:
     """
     Analyze image using Google Cloud Vision API
     
@@ -518,13 +541,15 @@ def analyze_image_with_vision_api(image: Image.Image) -> Dict[str, any]:
         logger.error(f"Google Cloud Vision API analysis failed: {str(e)}")
         return {'text': '', 'labels': [], 'objects': [], 'faces_detected': 0, 'confidence': 0}
 
-def extract_text_from_image(image_file, image_type='auto'):
+def extract_text_from_image(image_file, image_type='auto', on_stage=None):
     """
     Enhanced text extraction from image with comprehensive analysis
     
     Args:
         image_file: File object or path to image
         image_type: Type of image ('auto', 'general', 'technical', 'document')
+        on_stage: Optional callback called with 'classifying' and 'ocr' as
+            those stages start, e.g. to report progress
         
     Returns:
         dict: Comprehensive analysis results
@@ -587,6 +612,8 @@ def extract_text_from_image(image_file, image_type='auto'):
                 logger.warning(f"Google Vision API failed, falling back to OCR: {str(e)}")
         
         # Auto-detect image type if not specified
+        if on_stage:
+            on_stage('classifying')
         if image_type == 'auto':
             classification = classify_image_content(image)
             image_type = classification['image_type']
@@ -600,6 +627,8 @@ def extract_text_from_image(image_file, image_type='auto'):
         processing_variant = None
 
         if pytesseract_available:
+            if on_stage:
+                on_stage('ocr')
             try:
                 # Extract text using multiple techniques
                 extraction_results = extract_text_with_multiple_techniques(image, classification)
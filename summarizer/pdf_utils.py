@@ -0,0 +1,335 @@
+import os
+import re
+import math
+import logging
+import unicodedata
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pdfplumber
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PAGE_SEPARATOR = "\n"
+
+# Shared process pool for parallel extraction, created on first use
+_extraction_pool = None
+_extraction_pool_workers = 0
+_extraction_pool_lock = threading.Lock()
+
+
+def _rewind(pdf_file):
+    if hasattr(pdf_file, 'seek'):
+        pdf_file.seek(0)
+
+
+def iter_pdf_pages(pdf_file, pages: Optional[List[int]] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield the text of a PDF one page at a time
+
+    Each page's layout cache is flushed as soon as its text has been read so
+    that long documents never hold the parsed layout of every page at once.
+
+    Args:
+        pdf_file: File object or path to the PDF
+        pages: Optional list of 1-based page numbers to read (default: all)
+
+    Yields:
+        Tuple of (page_number, page_text); page numbers start at 1 and pages
+        without a text layer yield an empty string
+    """
+    _rewind(pdf_file)
+    with pdfplumber.open(pdf_file, pages=pages) as pdf:
+        for page in pdf.pages:
+            try:
+                text = page.extract_text() or ""
+            except Exception as e:
+                logger.warning(f"Text extraction failed for page {page.page_number}: {str(e)}")
+                text = ""
+            finally:
+                page.flush_cache()
+            yield page.page_number, text
+
+
+def normalize_page_text(text: str) -> str:
+    """Normalize extracted page text (Unicode NFC, no NULs or trailing spaces)."""
+    text = unicodedata.normalize('NFC', text.replace('\x00', ''))
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return re.sub(r'[ \t]+\n', '\n', text).strip()
+
+
+def join_pages(pages) -> Dict[str, Any]:
+    """
+    Join page texts into one document and record where each page starts
+
+    Args:
+        pages: Iterable of (page_number, page_text) in page order
+
+    Returns:
+        Dict containing the joined text, the character offset of every page
+        (``page_offsets[n - 1]`` is where page ``n`` starts) and the page count
+    """
+    parts: List[str] = []
+    page_offsets: List[int] = []
+    offset = 0
+    for _, text in pages:
+        text = normalize_page_text(text)
+        page_offsets.append(offset)
+        parts.append(text)
+        parts.append(PAGE_SEPARATOR)
+        offset += len(text) + len(PAGE_SEPARATOR)
+
+    return {
+        'text': ''.join(parts),
+        'page_offsets': page_offsets,
+        'page_count': len(page_offsets)
+    }
+
+
+def count_pdf_pages(pdf_file) -> int:
+    """Count the pages of a PDF without extracting any text."""
+    _rewind(pdf_file)
+    with pdfplumber.open(pdf_file) as pdf:
+        return len(pdf.pages)
+
+
+@contextmanager
+def _pdf_path(pdf_file):
+    """
+    Provide a filesystem path for a PDF so worker processes can open it
+
+    Paths and files already on disk are used as-is; in-memory uploads are
+    spooled to a temporary file that is removed afterwards.
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        yield os.fspath(pdf_file)
+        return
+    if hasattr(pdf_file, 'temporary_file_path'):
+        yield pdf_file.temporary_file_path()
+        return
+    try:
+        path = pdf_file.path
+    except (AttributeError, NotImplementedError, ValueError):
+        path = None
+    if path and os.path.exists(path):
+        yield path
+        return
+
+    _rewind(pdf_file)
+    tmp = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    try:
+        with tmp:
+            chunks = pdf_file.chunks() if hasattr(pdf_file, 'chunks') else iter(lambda: pdf_file.read(1024 * 1024), b'')
+            for chunk in chunks:
+                tmp.write(chunk)
+        yield tmp.name
+    finally:
+        os.unlink(tmp.name)
+
+
+def _extract_page_range(path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Worker entry point: open the PDF independently and read pages start..stop-1."""
+    return list(iter_pdf_pages(path, pages=list(range(start, stop))))
+
+
+def _get_extraction_pool(workers: int):
+    """
+    Process pool for page ranges: a ProcessPoolExecutor, or billiard's Pool in a daemonic process
+
+    Celery's prefork workers are daemonic billiard processes, and the
+    standard library refuses to start children from those ("daemonic
+    processes are not allowed to have children"); billiard, Celery's fork
+    of multiprocessing, does not.
+    """
+    global _extraction_pool, _extraction_pool_workers
+    with _extraction_pool_lock:
+        if _extraction_pool is None or _extraction_pool_workers != workers:
+            if isinstance(_extraction_pool, ProcessPoolExecutor):
+                _extraction_pool.shutdown(wait=False)
+            elif _extraction_pool is not None:
+                _extraction_pool.terminate()
+            # Spawned workers only import pdfplumber; forking a web or Celery
+            # process would copy its loaded models and threads
+            if multiprocessing.current_process().daemon:
+                import billiard
+                _extraction_pool = billiard.get_context('spawn').Pool(workers)
+            else:
+                _extraction_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            _extraction_pool_workers = workers
+        return _extraction_pool
+
+
+def _extract_serial(pdf_file, page_count: Optional[int] = None) -> List[Tuple[int, str]]:
+    pages = list(range(1, page_count + 1)) if page_count else None
+    return list(iter_pdf_pages(pdf_file, pages=pages))
+
+
+def _extract_parallel(path: str, page_count: int, workers: int) -> List[Tuple[int, str]]:
+    # A few ranges per worker keeps the pool busy when some pages are slower
+    ranges = min(page_count, workers * 2)
+    size = math.ceil(page_count / ranges)
+    bounds = [(start, min(start + size, page_count + 1)) for start in range(1, page_count + 1, size)]
+
+    pool = _get_extraction_pool(workers)
+    if isinstance(pool, ProcessPoolExecutor):
+        results = [pool.submit(_extract_page_range, path, start, stop).result for start, stop in bounds]
+    else:
+        results = [pool.apply_async(_extract_page_range, (path, start, stop)).get for start, stop in bounds]
+
+    # Results are collected in submission order, which is page order
+    pages = []
+    for result in results:
+        pages.extend(result())
+    return pages
+
+
+def _ocr_page_image(image) -> str:
+    from .ocr_utils import classify_image_content, extract_text_with_multiple_techniques
+
+    classification = classify_image_content(image)
+    result = extract_text_with_multiple_techniques(image, classification)
+    if result.get('error'):
+        raise Exception(result['error'])
+    return result.get('text', '')
+
+
+def ocr_pdf_pages(pdf_file, page_numbers: List[int]) -> Dict[int, str]:
+    """
+    Rasterize the given pages and run them through the OCR pipeline
+
+    Pages are rendered one at a time in the calling thread and recognized on a
+    bounded thread pool (Tesseract runs as a subprocess, so threads overlap
+    well); at most two rendered pages per worker are held in memory.
+
+    Args:
+        pdf_file: File object or path to the PDF
+        page_numbers: 1-based numbers of the pages to OCR
+
+    Returns:
+        Dict mapping page number to recognized text (pages that failed are omitted)
+    """
+    workers = getattr(settings, 'PDF_OCR_WORKERS', 2)
+    resolution = getattr(settings, 'PDF_OCR_RESOLUTION', 200)
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    futures = {}
+
+    def recognize(image):
+        try:
+            return _ocr_page_image(image)
+        finally:
+            image.close()
+            in_flight.release()
+
+    _rewind(pdf_file)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        with pdfplumber.open(pdf_file, pages=page_numbers) as pdf:
+            for page in pdf.pages:
+                in_flight.acquire()
+                try:
+                    image = page.to_image(resolution=resolution).original.convert('RGB')
+                except Exception as e:
+                    in_flight.release()
+                    logger.warning(f"Could not rasterize page {page.page_number}: {str(e)}")
+                    continue
+                finally:
+                    page.flush_cache()
+                futures[page.page_number] = pool.submit(recognize, image)
+
+    results = {}
+    for page_number, future in futures.items():
+        try:
+            results[page_number] = future.result()
+        except Exception as e:
+            logger.warning(f"OCR failed for page {page_number}: {str(e)}")
+    return results
+
+
+def _fill_scanned_pages(pdf_file, pages: List[Tuple[int, str]]) -> Tuple[List[Tuple[int, str]], List[int]]:
+    """Replace pages without a usable text layer by their OCR text, keeping page order."""
+    min_chars = getattr(settings, 'PDF_OCR_MIN_CHARS', 10)
+    missing = [number for number, text in pages if len(text.strip()) < min_chars]
+    if not missing or not getattr(settings, 'PDF_OCR_FALLBACK', True):
+        return pages, []
+
+    logger.info(f"Running OCR on {len(missing)} of {len(pages)} pages without a text layer")
+    recognized = ocr_pdf_pages(pdf_file, missing)
+    filled = [(number, recognized.get(number) or text) for number, text in pages]
+    return filled, sorted(recognized)
+
+
+def extract_pdf_pages(pdf_file, parallel: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Extract the text of a PDF together with its page-offset index
+
+    Large documents are split into page ranges that are read by a pool of
+    worker processes and merged back in page order; small documents stay on
+    the single-process path where pool overhead would dominate. Pages without
+    a text layer (scans) are then rasterized and sent through the OCR
+    pipeline, while pages with text keep the fast path.
+
+    Args:
+        pdf_file: File object or path to the PDF
+        parallel: Force (True) or disable (False) multi-process extraction;
+            by default it is used from PDF_PARALLEL_MIN_PAGES pages upwards
+
+    Returns:
+        Dict with 'text', 'page_offsets', 'page_count' and 'ocr_pages' (the
+        page numbers whose text came from OCR)
+    """
+    pages = _extract_text_layer(pdf_file, parallel)
+    pages, ocr_pages = _fill_scanned_pages(pdf_file, pages)
+    extracted = join_pages(pages)
+    extracted['ocr_pages'] = ocr_pages
+    return extracted
+
+
+def _extract_text_layer(pdf_file, parallel: Optional[bool]) -> List[Tuple[int, str]]:
+    workers = getattr(settings, 'PDF_EXTRACTION_WORKERS', None) or os.cpu_count() or 1
+    if parallel is False or workers < 2:
+        return _extract_serial(pdf_file)
+
+    page_count = count_pdf_pages(pdf_file)
+    if parallel is None:
+        parallel = page_count >= getattr(settings, 'PDF_PARALLEL_MIN_PAGES', 64)
+    if not parallel or page_count < 2:
+        return _extract_serial(pdf_file)
+
+    try:
+        with _pdf_path(pdf_file) as path:
+            return _extract_parallel(path, page_count, workers)
+    except Exception as e:
+        logger.warning(f"Parallel PDF extraction failed, falling back to a single process: {str(e)}")
+        return _extract_serial(pdf_file)
+
+
+def extract_text_from_pdf(pdf_file) -> str:
+    """Extract the full text of a PDF, one line break after every page."""
+    return extract_pdf_pages(pdf_file)['text']
+
+
+def get_page_span(page_offsets: List[int], page_number: int, text_length: int) -> Tuple[int, int]:
+    """
+    Get the (start, end) character span of a page inside the joined text
+
+    Args:
+        page_offsets: Offsets as returned by join_pages
+        page_number: 1-based page number
+        text_length: Length of the joined text
+
+    Returns:
+        Tuple of (start, end) suitable for slicing the joined text
+    """
+    if page_number < 1 or page_number > len(page_offsets):
+        raise IndexError(f"Page {page_number} is out of range")
+    start = page_offsets[page_number - 1]
+    end = page_offsets[page_number] if page_number < len(page_offsets) else text_length
+    return start, end
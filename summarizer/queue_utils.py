@@ -0,0 +1,92 @@
+import logging
+import statistics
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from kombu.exceptions import ChannelError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Most recent waits kept per queue for the percentiles
+WAIT_WINDOW = 500
+
+
+def _wait_key(queue: str) -> str:
+    return f"queue-wait:{queue}"
+
+
+def get_queue_names() -> List[str]:
+    """Names of the configured Celery queues, most urgent first"""
+    return [queue.name for queue in settings.CELERY_TASK_QUEUES]
+
+
+def record_queue_wait(queue: str, seconds: float) -> None:
+    """
+    Add the time one task spent waiting in a queue to the queue's metrics
+
+    Every worker process writes to the shared SUMMARIZER_QUEUE_METRICS_CACHE
+    without locking, so a sample is occasionally lost to a concurrent write;
+    that is fine for sizing worker pools.
+    """
+    cache = caches[settings.SUMMARIZER_QUEUE_METRICS_CACHE]
+    metrics = cache.get(_wait_key(queue)) or {'tasks': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'recent': []}
+    metrics['tasks'] += 1
+    metrics['total_seconds'] += seconds
+    metrics['max_seconds'] = max(metrics['max_seconds'], seconds)
+    metrics['recent'] = (metrics['recent'] + [round(seconds, 3)])[-WAIT_WINDOW:]
+    cache.set(_wait_key(queue), metrics, None)
+
+
+def reset_queue_waits() -> None:
+    cache = caches[settings.SUMMARIZER_QUEUE_METRICS_CACHE]
+    cache.delete_many([_wait_key(queue) for queue in get_queue_names()])
+
+
+def get_queue_depths(app) -> Dict[str, Optional[int]]:
+    """Messages waiting in each queue; None for every queue when the broker cannot be reached"""
+    depths = {}
+    try:
+        with app.connection_for_read() as connection:
+            connection.ensure_connection(max_retries=1)
+            channel = connection.default_channel
+            for queue in get_queue_names():
+                try:
+                    depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                except ChannelError:
+                    # Redis drops the keys of an empty queue
+                    depths[queue] = 0
+    except Exception as e:
+        logger.warning(f"Could not read queue depths from the broker: {e}")
+        return {queue: None for queue in get_queue_names()}
+    return depths
+
+
+def get_queue_stats(app) -> Dict[str, Dict[str, Any]]:
+    """
+    Depth and wait times of every queue
+
+    Returns:
+        Dict mapping queue name to its 'depth', the number of 'tasks' started
+        since the last reset, and their 'mean_wait', 'p50_wait', 'p95_wait'
+        (over the last WAIT_WINDOW tasks) and 'max_wait' in seconds (None
+        before any task)
+    """
+    cache = caches[settings.SUMMARIZER_QUEUE_METRICS_CACHE]
+    depths = get_queue_depths(app)
+    stats = {}
+    for queue in get_queue_names():
+        metrics = cache.get(_wait_key(queue))
+        stats[queue] = {'depth': depths[queue], 'tasks': 0, 'mean_wait': None, 'p50_wait': None, 'p95_wait': None,
+                        'max_wait': None}
+        if metrics and metrics['recent']:
+            recent = sorted(metrics['recent'])
+            stats[queue].update(
+                tasks=metrics['tasks'],
+                mean_wait=round(metrics['total_seconds'] / metrics['tasks'], 3),
+                p50_wait=statistics.median(recent),
+                p95_wait=recent[min(len(recent) - 1, int(0.95 * len(recent)))],
+                max_wait=round(metrics['max_seconds'], 3)
+            )
+    return stats
@@ -0,0 +1,127 @@
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Channel of the step that runs the whole document (start, chunk, level,
+# delta and the final summary); chord tasks publish their chunks on their own
+MAIN_CHANNEL = 'main'
+
+
+def _cache():
+    return caches[settings.SUMMARIZER_STREAM_CACHE]
+
+
+def _lock_key(pdf_id: int) -> str:
+    return f"summary-stream:{pdf_id}"
+
+
+def _channels_key(pdf_id: int) -> str:
+    return f"summary-stream-channels:{pdf_id}"
+
+
+def _events_key(pdf_id: int, channel: str) -> str:
+    return f"summary-stream-events:{pdf_id}:{channel}"
+
+
+def acquire_stream_lock(pdf_id: int) -> Optional[str]:
+    """Claim a document's summary stream; returns the lock token, or None if another run holds it"""
+    # The token tells this run's lock apart from one taken after it expired
+    token = uuid.uuid4().hex
+    if _cache().add(_lock_key(pdf_id), token, settings.SUMMARIZER_STREAM_LOCK_SECONDS):
+        return token
+    return None
+
+
+def is_stream_locked(pdf_id: int) -> bool:
+    return _cache().get(_lock_key(pdf_id)) is not None
+
+
+def add_stream_channels(pdf_id: int, channels: List[str]) -> None:
+    """Register the channels of concurrent writers (e.g. chord tasks) for relaying connections"""
+    cache = _cache()
+    known = cache.get(_channels_key(pdf_id)) or [MAIN_CHANNEL]
+    cache.set(_channels_key(pdf_id), known + [c for c in channels if c not in known],
+              settings.SUMMARIZER_STREAM_LOCK_SECONDS)
+
+
+def clear_stream(pdf_id: int, token: Optional[str] = None) -> None:
+    """
+    Drop a document's published events
+
+    With a token, only if that run still holds the stream lock (which is
+    released as well); a lock taken by a later run is left alone.
+    """
+    cache = _cache()
+    if token is not None and cache.get(_lock_key(pdf_id)) != token:
+        return
+    channels = cache.get(_channels_key(pdf_id)) or [MAIN_CHANNEL]
+    keys = [_events_key(pdf_id, channel) for channel in channels] + [_channels_key(pdf_id)]
+    if token is not None:
+        keys.append(_lock_key(pdf_id))
+    cache.delete_many(keys)
+
+
+class StreamPublisher:
+    """
+    Publish one writer's summary events so other connections can relay them
+
+    Each channel has a single writer at a time, which appends to the events
+    the channel already holds unless append is False (a task that is run
+    again replaces its earlier events). Per-section and per-token events are written
+    at most twice a second, others at once. With a lock token, every write
+    refreshes the stream lock and nothing is written once the lock belongs
+    to another run.
+    """
+
+    def __init__(self, pdf_id: int, channel: str = MAIN_CHANNEL, token: Optional[str] = None,
+                 append: bool = True):
+        self.pdf_id = pdf_id
+        self.token = token
+        self._key = _events_key(pdf_id, channel)
+        self._events = (_cache().get(self._key) or []) if append else []
+        self._last_write = 0.0
+        self._dirty = False
+
+    def send(self, name: str, data: Dict[str, Any]) -> None:
+        self._events.append((name, data))
+        self._dirty = True
+        if name not in ('chunk', 'delta') or time.monotonic() - self._last_write > 0.5:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+        cache = _cache()
+        timeout = settings.SUMMARIZER_STREAM_LOCK_SECONDS
+        if self.token is not None:
+            if cache.get(_lock_key(self.pdf_id)) != self.token:
+                return
+            cache.touch(_lock_key(self.pdf_id), timeout)
+        cache.set(self._key, self._events, timeout)
+        self._last_write = time.monotonic()
+        self._dirty = False
+
+
+def iter_relayed_events(pdf_id: int, running: Callable[[], bool],
+                        poll_seconds: float = 1.0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Follow the summary events another process publishes for a document
+
+    Yields (event name, data) from every channel until running() turns
+    False, then whatever was published last; the caller falls back to the
+    saved summary if no 'summary' or 'error' came through.
+    """
+    cache = _cache()
+    sent: Dict[str, int] = {}
+    while True:
+        active = running()
+        for channel in cache.get(_channels_key(pdf_id)) or [MAIN_CHANNEL]:
+            events = cache.get(_events_key(pdf_id, channel)) or []
+            yield from events[sent.get(channel, 0):]
+            sent[channel] = max(sent.get(channel, 0), len(events))
+        if not active:
+            return
+        time.sleep(poll_seconds)
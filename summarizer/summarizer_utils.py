@@ -1,65 +1,581 @@
 import os
-import google.generativeai as genai
-from transformers import pipeline
-import pdfplumber
+import math
+import time
+import json
+import hashlib
+import logging
+import requests
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
+from django.conf import settings
+from django.core.cache import caches
+from .pdf_utils import extract_text_from_pdf, extract_pdf_pages  # noqa: F401
+from .chunk_utils import chunk_text_by_count, chunk_text_by_tokens
+from .gemini_client import get_gemini_client
+from .model_registry import registry
+from .micro_batcher import MicroBatcher
+from .extractive_utils import estimate_tokens, extract_salient_text
+from .tier_utils import choose_tier, get_tiers, record_latency
 
 load_dotenv()
 
-def extract_text_from_pdf(pdf_file):
-    text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
-
-# Initialize summarizer once as a global variable for reuse
-try:
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-except Exception as e:
-    print(f"Warning: Could not initialize summarizer: {e}")
-    summarizer = None
-
-def get_bert_gpt2_summary(text, max_length=150, min_length=50):
-    if summarizer is None:
-        return {'summary': 'Summarizer not available. Please check your installation.'}
+logger = logging.getLogger(__name__)
+
+# Decoding presets for chunk summaries (SUMMARIZER_DECODING). Only the
+# deterministic ones ('beam', 'greedy') can use the chunk summary cache.
+DECODING_PRESETS = {
+    'beam': {'do_sample': False, 'num_beams': 4},
+    'greedy': {'do_sample': False, 'num_beams': 1},
+    'sample': {'do_sample': True, 'top_k': 50, 'top_p': 0.95},
+}
+
+def get_generation_params(decoding=None):
+    """Generation parameters of a decoding preset (default: SUMMARIZER_DECODING)"""
+    decoding = decoding or settings.SUMMARIZER_DECODING
+    if decoding not in DECODING_PRESETS:
+        raise ValueError(f"Unknown decoding mode {decoding!r}, expected one of {list(DECODING_PRESETS)}")
+    return dict(DECODING_PRESETS[decoding])
+
+# One micro-batcher per (model, backend) pipeline, created on first use
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+# The summarizer is loaded on first use rather than at import time, so
+# management commands and Celery control processes never import torch.
+# Loaded pipelines live in the model registry, shared by every entry point.
+def _summarizer_key(backend=None, model=None):
+    return ('summarization', model or settings.SUMMARIZER_MODEL, settings.SUMMARIZER_DTYPE,
+            backend or settings.SUMMARIZER_BACKEND)
+
+def load_summarizer(backend=None, model=None):
+    """Load the summarization pipeline into this process, retrying an earlier failed load"""
+    return registry.get(*_summarizer_key(backend, model), retry_failed=True)
+
+def get_summarizer(backend=None, model=None):
+    """Get the summarization pipeline for a model and inference backend (default: SUMMARIZER_MODEL/_BACKEND)"""
+    return registry.get(*_summarizer_key(backend, model))
+
+def get_model_load_stats(backend=None):
+    """Load time and last load error of the configured summarization model"""
+    key = _summarizer_key(backend)
+    return {
+        'model': settings.SUMMARIZER_MODEL,
+        'backend': key[-1],
+        'load_seconds': registry.load_times.get('/'.join(key)),
+        'error': registry.last_error(*key)
+    }
+
+def is_model_ready():
+    """Readiness check: True once this process (or the model server) can summarize"""
+    if settings.MODEL_SERVER_URL:
+        try:
+            response = requests.get(settings.MODEL_SERVER_URL.rstrip('/') + '/health', timeout=2)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+    return registry.is_loaded(*_summarizer_key())
+
+def warm_up():
+    """Load models now instead of on the first request"""
+    if settings.MODEL_SERVER_URL:
+        return is_model_ready()
+    return load_summarizer() is not None
+
+def get_batcher(backend=None, model=None):
+    """Get the process-wide micro-batcher in front of a model's pipeline"""
+    key = _summarizer_key(backend, model)
+    with _batchers_lock:
+        if key not in _batchers:
+            def run_batch(items, params):
+                summarizer = registry.get(*key)
+                if summarizer is None:
+                    raise RuntimeError('Summarizer not available')
+                return [output['summary_text'] for output in summarizer(items, batch_size=len(items), **params)]
+            
+            _batchers[key] = MicroBatcher(
+                run_batch,
+                max_batch_size=settings.SUMMARIZER_MICRO_BATCH_SIZE,
+                max_wait_ms=settings.SUMMARIZER_MICRO_BATCH_WAIT_MS,
+                name=f"micro-batcher-{key[1]}"
+            )
+        return _batchers[key]
+
+def get_batcher_stats():
+    """Batch sizes and queue waits of every micro-batcher in this process"""
+    with _batchers_lock:
+        batchers = dict(_batchers)
+    return {'/'.join(key[1:]): batcher.get_stats() for key, batcher in batchers.items()}
+
+def _run_direct(summarizer, chunks, order, batch_size, params):
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        results = {}
+        try:
+            outputs = summarizer([chunks[i] for i in batch], batch_size=len(batch), **params)
+            for i, output in zip(batch, outputs):
+                results[i] = output['summary_text']
+        except Exception as e:
+            # Retry one by one so a single bad chunk doesn't drop the whole batch
+            logger.warning(f"Batch summarization failed, retrying chunks individually: {e}")
+            for i in batch:
+                try:
+                    results[i] = summarizer(chunks[i], **params)[0]['summary_text']
+                except Exception as e:
+                    logger.error(f"Error summarizing chunk: {e}")
+        yield [(i, results.get(i)) for i in batch]
+
+def _run_micro_batched(batcher, chunks, order, params, max_batch_size=None):
+    futures = {batcher.submit(chunks[i], params, max_batch_size=max_batch_size): i for i in order}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            group = []
+            for future in done:
+                try:
+                    group.append((futures[future], future.result()))
+                except Exception as e:
+                    logger.error(f"Error summarizing chunk: {e}")
+                    group.append((futures[future], None))
+            yield sorted(group)
+    finally:
+        # A caller that stops early (e.g. a closed stream) leaves nothing queued
+        for future in pending:
+            future.cancel()
+
+def iter_chunk_summaries(chunks, chunk_tokens=None, max_length=150, min_length=50, batch_size=None, backend=None,
+                         model=None, use_cache=True, micro_batching=None, **generate_kwargs):
+    """
+    Summarize chunks in padded, length-sorted batches, yielding results as they complete
     
-    # Split text into chunks if it's too long
-    max_chunk_length = 1024
-    chunks = [text[i:i + max_chunk_length] for i in range(0, len(text), max_chunk_length)]
+    Sorting by length keeps chunks of similar size together so little
+    compute is spent on padding. With deterministic decoding, chunks
+    summarized before with the same model and parameters are taken from the
+    persistent summary cache and yielded first. With micro-batching, chunks
+    go through the model's MicroBatcher, which runs them in batches together
+    with the chunks of other concurrent requests; an explicit batch_size
+    still caps those batches.
     
-    summaries = []
+    Args:
+        chunks: List of chunk texts
+        chunk_tokens: Token count of each chunk (default: character length)
+        max_length: Maximum summary length in tokens
+        min_length: Minimum summary length in tokens
+        batch_size: Most chunks per forward pass (default: SUMMARIZER_BATCH_SIZE, or
+            SUMMARIZER_MICRO_BATCH_SIZE with micro-batching)
+        backend: Inference backend (default: SUMMARIZER_BACKEND)
+        model: Model id (default: SUMMARIZER_MODEL)
+        use_cache: Use the persistent summary cache (deterministic decoding only)
+        micro_batching: Share batches with concurrent callers (default: SUMMARIZER_MICRO_BATCHING)
+        **generate_kwargs: Extra generation parameters
+        
+    Yields:
+        Tuples of (chunk index, summary); the summary is None where
+        summarization failed
+    """
+    max_batch_size = batch_size
+    batch_size = max(1, batch_size or getattr(settings, 'SUMMARIZER_BATCH_SIZE', 4))
+    backend = backend or settings.SUMMARIZER_BACKEND
+    model = model or settings.SUMMARIZER_MODEL
+    if micro_batching is None:
+        micro_batching = getattr(settings, 'SUMMARIZER_MICRO_BATCHING', False)
+    lengths = chunk_tokens or [len(chunk) for chunk in chunks]
+    params = dict(max_length=max_length, min_length=min_length, truncation=True, **generate_kwargs)
     
-    for chunk in chunks:
-        if len(chunk.strip()) > 100:  # Only summarize chunks with substantial content
-            try:
-                # Get summary with different parameters for variety
-                summary = summarizer(chunk, 
-                                   max_length=max_length, 
-                                   min_length=min_length,
-                                   do_sample=True, 
-                                   top_k=50, 
-                                   top_p=0.95)[0]['summary_text']
-                summaries.append(summary)
-            except Exception as e:
-                print(f"Error summarizing chunk: {e}")
-                continue
+    cached = {}
+    use_cache = use_cache and not params.get('do_sample')
+    if use_cache and chunks:
+        from .cache_utils import load_cached_summaries, store_cached_summaries
+        cached = load_cached_summaries(chunks, model, backend, params)
+        logger.info(f"Reused {len(cached)} of {len(chunks)} chunk summaries from the cache")
+        yield from sorted(cached.items())
     
-    if not summaries:
-        return {'summary': 'Could not generate summary. Please try again.'}
+    order = sorted((i for i in range(len(chunks)) if i not in cached), key=lambda i: lengths[i], reverse=True)
+    if not order:
+        return
+    if micro_batching:
+        groups = _run_micro_batched(get_batcher(backend, model), chunks, order, params, max_batch_size)
+    else:
+        groups = _run_direct(get_summarizer(backend, model), chunks, order, batch_size, params)
     
-    return {
-        'summary': ' '.join(summaries)
-    }
+    for group in groups:
+        # Stored per batch, so work survives a client that disconnects mid-stream
+        if use_cache:
+            store_cached_summaries({chunks[i]: s for i, s in group if s}, model, backend, params)
+        yield from group
 
-def get_gemini_summary(text, custom_prompt=None, max_length=150):
+def summarize_chunks(chunks, chunk_tokens=None, max_length=150, min_length=50, batch_size=None, backend=None,
+                     model=None, use_cache=True, micro_batching=None, **generate_kwargs):
+    """
+    Summarize chunks in padded, length-sorted batches (see iter_chunk_summaries)
+    
+    Returns:
+        List with one summary per chunk in the original order (None where
+        summarization failed)
+    """
+    results = [None] * len(chunks)
+    for i, summary in iter_chunk_summaries(chunks, chunk_tokens, max_length=max_length, min_length=min_length,
+                                           batch_size=batch_size, backend=backend, model=model, use_cache=use_cache,
+                                           micro_batching=micro_batching, **generate_kwargs):
+        results[i] = summary
+    return results
+
+def get_bert_gpt2_summary(text, max_length=150, min_length=50, batch_size=None, target_length=None,
+                          latency_budget=None):
+    if settings.MODEL_SERVER_URL:
+        return _get_remote_summary(text, max_length=max_length, min_length=min_length, batch_size=batch_size,
+                                   target_length=target_length, latency_budget=latency_budget)
+    return summarize_locally(text, max_length=max_length, min_length=min_length, batch_size=batch_size,
+                             target_length=target_length, latency_budget=latency_budget)
+
+def _get_remote_summary(text, max_length=150, min_length=50, batch_size=None, target_length=None,
+                        latency_budget=None):
+    """Ask the shared model server (see run_model_server) for the summary"""
     try:
-        # Configure Gemini API
-        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        response = requests.post(
+            settings.MODEL_SERVER_URL.rstrip('/') + '/summarize',
+            json={'text': text, 'max_length': max_length, 'min_length': min_length, 'batch_size': batch_size,
+                  'target_length': target_length, 'latency_budget': latency_budget},
+            timeout=settings.MODEL_SERVER_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.error(f"Model server request failed: {e}")
+        return {'summary': 'Could not generate summary. Please try again.'}
+
+def summarize_locally(text, max_length=150, min_length=50, batch_size=None, backend=None, target_length=None,
+                      latency_budget=None):
+    """Summarize with the pipeline loaded in this process (see iter_summary_events)"""
+    result = {'summary': 'Could not generate summary. Please try again.'}
+    for event in iter_summary_events(text, target_length=target_length, max_length=max_length,
+                                     min_length=min_length, batch_size=batch_size, backend=backend,
+                                     latency_budget=latency_budget):
+        if event['event'] in ('summary', 'error'):
+            result = {key: value for key, value in event.items() if key != 'event'}
+    return result
+
+def _level_cache_key(chunks, params):
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8'))
+    for chunk in chunks:
+        digest.update(b'\0' + chunk.encode('utf-8'))
+    return f"summary-level:{digest.hexdigest()}"
+
+def _summarize_level(chunks, chunk_tokens, params, batch_size=None, backend=None, model=None):
+    """
+    Summarize one level of the reduction tree, reusing a cached result for identical input
+
+    Sampled decoding is neither read from nor written to the cache, so every
+    run gets a fresh sample.
+    """
+    use_cache = not params.get('do_sample')
+    cache = caches[settings.SUMMARIZER_LEVEL_CACHE]
+    key = _level_cache_key(chunks, {'model': model, 'backend': backend, **params})
+    results = cache.get(key) if use_cache else None
+    cached = results is not None
+    if not cached:
+        results = summarize_chunks(chunks, chunk_tokens, batch_size=batch_size, backend=backend, model=model, **params)
+        if use_cache and any(results):
+            cache.set(key, results, settings.SUMMARIZER_LEVEL_CACHE_TIMEOUT)
+    return [summary for summary in results if summary], cached
+
+def _iter_map_level(chunks, chunk_tokens, params, batch_size=None, backend=None, model=None):
+    """Like _summarize_level for the chunk level, but yields each chunk summary as soon as it is ready"""
+    use_cache = not params.get('do_sample')
+    cache = caches[settings.SUMMARIZER_LEVEL_CACHE]
+    key = _level_cache_key(chunks, {'model': model, 'backend': backend, **params})
+    results = cache.get(key) if use_cache else None
+    if results is not None:
+        for i, summary in enumerate(results):
+            yield i, summary, True
+        return
+    
+    results = [None] * len(chunks)
+    for i, summary in iter_chunk_summaries(chunks, chunk_tokens, batch_size=batch_size, backend=backend, model=model,
+                                           **params):
+        results[i] = summary
+        yield i, summary, False
+    if use_cache and any(results):
+        cache.set(key, results, settings.SUMMARIZER_LEVEL_CACHE_TIMEOUT)
+
+def iter_summary_events(text, target_length=None, max_length=150, min_length=50, batch_size=None, backend=None,
+                        model=None, latency_budget=None):
+    """
+    Summarize a text, yielding progress events as the work completes
+    
+    Unless a model is given, SUMMARIZER_TIER_POLICY picks the model tier
+    expected to finish within the latency budget, from the document's token
+    count and the per-token latency measured on earlier runs (see
+    tier_utils). A tier without a model, or one whose model cannot be
+    loaded, returns an extractive summary instead.
+    
+    Args:
+        text: Text to summarize
+        target_length: Maximum length of the final summary in tokens
+            (default: SUMMARIZER_TARGET_LENGTH)
+        max_length: Maximum summary length per chunk in tokens
+        min_length: Minimum summary length per chunk in tokens
+        batch_size: Chunks per forward pass (default: SUMMARIZER_BATCH_SIZE)
+        backend: Inference backend (default: SUMMARIZER_BACKEND)
+        model: Model id; skips the tier policy (default: chosen by tier)
+        latency_budget: Seconds the caller can wait (default: SUMMARIZER_LATENCY_BUDGET)
+        
+    Yields:
+        A 'tier' event (tier, model, estimated_seconds) when the policy is
+        used, then the events of iter_plan_summary_events
+    """
+    plan = plan_summary(text, backend=backend, model=model, latency_budget=latency_budget)
+    if plan['tier']:
+        yield {'event': 'tier', 'tier': plan['tier'], 'model': plan['tier_model'],
+               'estimated_seconds': plan['estimated_seconds']}
+    yield from iter_plan_summary_events(plan, target_length, max_length, min_length, batch_size)
+
+def plan_summary(text, backend=None, model=None, latency_budget=None):
+    """
+    Decide how a text will be summarized and chunk it for that model
+    
+    This is everything before the model runs, so a background pipeline can
+    do it as its own step (see tasks.summarize_pdf_pipeline).
+    
+    Args:
+        text: Text to summarize
+        backend: Inference backend (default: SUMMARIZER_BACKEND)
+        model: Model id; skips the tier policy (default: chosen by tier)
+        latency_budget: Seconds the caller can wait (default: SUMMARIZER_LATENCY_BUDGET)
         
-        # Use custom prompt if provided, otherwise use default prompt
-        default_prompt = """Analyze the following text and provide a structured summary. Follow these exact formatting rules:
+    Returns:
+        JSON-serializable dict with the chosen 'tier' (None without the tier
+        policy), its 'tier_model' and 'estimated_seconds', the 'model' and
+        'backend' that will run and the 'estimated_tokens' of the text. Model
+        plans carry the 'chunks', 'chunk_tokens', 'chunk_count' and
+        'token_count'; extractive plans ('model' is None) carry the 'text';
+        plans whose model cannot be loaded carry an 'error'.
+    """
+    backend = backend or settings.SUMMARIZER_BACKEND
+    plan = {'tier': None, 'tier_model': None, 'estimated_seconds': None, 'model': model, 'backend': backend,
+            'estimated_tokens': estimate_tokens(text)}
+    if not model and getattr(settings, 'SUMMARIZER_TIER_POLICY', False):
+        tier = choose_tier(plan['estimated_tokens'], latency_budget)
+        plan.update(tier=tier['name'], tier_model=tier.get('model'), estimated_seconds=tier['estimated_seconds'],
+                    model=tier.get('model'))
+        if plan['model'] and get_summarizer(backend, plan['model']) is None:
+            logger.warning(f"Model of tier {tier['name']} is not available, falling back to an extractive summary")
+            plan['model'] = None
+        if not plan['model']:
+            return dict(plan, text=text)
+    
+    plan['model'] = plan['model'] or settings.SUMMARIZER_MODEL
+    summarizer = get_summarizer(backend, plan['model'])
+    if summarizer is None:
+        return dict(plan, error='Summarizer not available. Please check your installation.')
+    
+    # Pack whole sentences into chunks that fill the model's input window
+    chunked = chunk_text_by_tokens(
+        text,
+        summarizer.tokenizer,
+        overlap_sentences=getattr(settings, 'SUMMARIZER_CHUNK_OVERLAP', 0)
+    )
+    # Only summarize chunks with substantial content
+    substantial = [i for i, chunk in enumerate(chunked['chunks']) if len(chunk.strip()) > 100]
+    return dict(
+        plan,
+        chunks=[chunked['chunks'][i] for i in substantial],
+        chunk_tokens=[chunked['chunk_tokens'][i] for i in substantial],
+        chunk_count=chunked['chunk_count'],
+        token_count=chunked['token_count']
+    )
+
+def summarize_plan_chunks(plan, max_length=150, min_length=50, batch_size=None):
+    """
+    Summarize the chunks of a model plan (or a slice of them) the way the map step does
+    
+    Lets the chunks of one document be summarized by several processes
+    (see tasks.summarize_pdf_task); their results are passed back to
+    iter_plan_summary_events as chunk_summaries. Each chunk summary is
+    stored in the persistent summary cache as soon as its batch is done.
+    
+    Returns:
+        List with one summary per chunk in plan['chunks'] (None where
+        summarization failed)
+    """
+    params = dict(max_length=max_length, min_length=min_length, **get_generation_params())
+    return summarize_chunks(plan['chunks'], plan['chunk_tokens'], batch_size=batch_size, backend=plan['backend'],
+                            model=plan['model'], **params)
+
+def iter_plan_summary_events(plan, target_length=None, max_length=150, min_length=50, batch_size=None,
+                             chunk_summaries=None):
+    """
+    Summarize a plan from plan_summary, yielding progress events as the work completes
+    
+    Model plans yield the events of _iter_model_summary_events; extractive
+    plans a single 'summary' (or 'error'). The final 'summary' event carries
+    the 'tier' when the tier policy chose it, and, when the model ran (the
+    map level was not served from the cache), its measured latency is folded
+    into the tier's estimate. Chunk summaries already produced
+    elsewhere (see summarize_plan_chunks) can be passed in as
+    chunk_summaries, in chunk order, so only the reduce step runs here;
+    such runs record no latency, since the map step was not timed.
+    """
+    if plan.get('error'):
+        yield {'event': 'error', 'summary': plan['error']}
+        return
+    
+    started = time.perf_counter()
+    if plan['model']:
+        map_cached = False
+        for event in _iter_model_summary_events(plan, target_length, max_length, min_length, batch_size,
+                                                chunk_summaries):
+            if event['event'] == 'chunk':
+                map_cached = event['cached']
+            elif event['event'] == 'summary' and plan['tier']:
+                # Model loading happened while planning, so it is left out of the measured latency
+                if not map_cached and chunk_summaries is None:
+                    record_latency(plan['tier'], plan['estimated_tokens'], time.perf_counter() - started)
+                event['tier'] = plan['tier']
+            yield event
+        return
+    
+    extract = extract_salient_text(plan['text'], target_length or settings.SUMMARIZER_TARGET_LENGTH)
+    if not extract['text']:
+        yield {'event': 'error', 'summary': 'Could not generate summary. Please try again.'}
+        return
+    extractive_tier = next((t['name'] for t in get_tiers() if not t.get('model')), 'extractive')
+    record_latency(extractive_tier, plan['estimated_tokens'], time.perf_counter() - started)
+    yield {'event': 'summary', 'summary': extract['text'], 'chunk_count': 0, 'token_count': plan['estimated_tokens'],
+           'backend': '', 'model': None, 'tier': extractive_tier}
+
+def _iter_model_summary_events(plan, target_length=None, max_length=150, min_length=50, batch_size=None,
+                               chunk_summaries=None):
+    """
+    Summarize the chunks of a model plan, yielding progress events as the work completes
+    
+    Every chunk is summarized first (map, in batched forward passes) and each
+    chunk summary is yielded as soon as its batch is done. With
+    SUMMARIZER_HIERARCHICAL, the chunk summaries are then regrouped into
+    model-sized inputs and summarized again, level by level, until they fit
+    in a single input, which gets a final pass down to the target length
+    (reduce); otherwise they are joined. Each level is cached by its input
+    and generation parameters, so only the final pass runs again when just
+    the target length changes.
+    
+    Args:
+        plan: Model plan from plan_summary
+        target_length: Maximum length of the final summary in tokens
+            (default: SUMMARIZER_TARGET_LENGTH)
+        max_length: Maximum summary length per chunk in tokens
+        min_length: Minimum summary length per chunk in tokens
+        batch_size: Chunks per forward pass (default: SUMMARIZER_BATCH_SIZE)
+        chunk_summaries: Summaries of the plan's chunks made elsewhere; the
+            map step is skipped and no 'chunk' events are yielded
+        
+    Yields:
+        Dicts with an 'event' key:
+        'start' (chunk_count, token_count), 'chunk' (index, total, summary,
+        cached: whether the map level came from the level cache),
+        'level' (one reduce level: inputs, outputs, tokens, cached),
+        then a final 'summary' (summary, chunk_count, token_count, levels,
+        backend, model) or 'error' (summary holds the error message)
+    """
+    backend, model = plan['backend'], plan['model']
+    target_length = target_length or settings.SUMMARIZER_TARGET_LENGTH
+    summarizer = get_summarizer(backend, model)
+    if summarizer is None:
+        yield {'event': 'error', 'summary': 'Summarizer not available. Please check your installation.'}
+        return
+    
+    chunks, chunk_tokens = plan['chunks'], plan['chunk_tokens']
+    logger.info(f"Summarizing {plan['token_count']} tokens in {len(chunks)} chunks")
+    yield {'event': 'start', 'chunk_count': len(chunks), 'token_count': plan['token_count']}
+    
+    # Map: summarize with the configured decoding preset
+    params = dict(max_length=max_length, min_length=min_length, **get_generation_params())
+    mapped = [None] * len(chunks)
+    map_cached = False
+    if chunk_summaries is not None:
+        mapped = chunk_summaries
+    else:
+        for i, summary, map_cached in _iter_map_level(chunks, chunk_tokens, params, batch_size=batch_size,
+                                                      backend=backend, model=model):
+            mapped[i] = summary
+            yield {'event': 'chunk', 'index': i, 'total': len(chunks), 'summary': summary, 'cached': map_cached}
+    summaries = [summary for summary in mapped if summary]
+    
+    if not summaries:
+        yield {'event': 'error', 'summary': 'Could not generate summary. Please try again.'}
+        return
+    
+    result = {'chunk_count': plan['chunk_count'], 'token_count': plan['token_count'], 'backend': backend,
+              'model': model}
+    if not getattr(settings, 'SUMMARIZER_HIERARCHICAL', False):
+        yield {'event': 'summary', 'summary': ' '.join(summaries), **result}
+        return
+    
+    # Reduce: re-summarize until the summaries fit one model input
+    levels = []
+    token_count = plan['token_count']
+    cached = map_cached
+    while True:
+        regrouped = chunk_text_by_tokens(' '.join(summaries), summarizer.tokenizer)
+        levels.append({'inputs': len(chunks), 'outputs': len(summaries), 'tokens': regrouped['token_count'], 'cached': cached})
+        yield {'event': 'level', 'level': len(levels) - 1, **levels[-1]}
+        chunks, chunk_tokens = regrouped['chunks'], regrouped['chunk_tokens']
+        # Stop once the summaries fit one model input, or if a level stopped shrinking them
+        if regrouped['chunk_count'] <= 1 or regrouped['token_count'] >= token_count:
+            break
+        token_count = regrouped['token_count']
+        logger.info(f"Reducing {len(summaries)} summaries ({token_count} tokens) in {len(chunks)} groups")
+        reduced, cached = _summarize_level(chunks, chunk_tokens, params, batch_size=batch_size, backend=backend,
+                                           model=model)
+        if not reduced:
+            break
+        summaries = reduced
+    
+    summary = ' '.join(chunks)
+    if levels[-1]['tokens'] > target_length:
+        # Final pass: the only level that depends on the target length
+        final_params = dict(
+            params,
+            max_length=max(1, target_length // len(chunks)),
+            min_length=min(min_length, target_length // (2 * len(chunks)))
+        )
+        final, cached = _summarize_level(chunks, chunk_tokens, final_params, batch_size=batch_size, backend=backend,
+                                         model=model)
+        if final:
+            summary = ' '.join(final)
+            levels.append({'inputs': len(chunks), 'outputs': len(final), 'tokens': None, 'cached': cached})
+            yield {'event': 'level', 'level': len(levels) - 1, **levels[-1]}
+    
+    yield {'event': 'summary', 'summary': summary, 'levels': levels, **result}
+
+GEMINI_SECTION_PROMPT = """The following is section {index} of {count} of a longer document. Summarize it as concise notes that keep every key point, concept, name and figure; they will be merged with the notes on the other sections.
+
+Section text:"""
+
+def estimate_gemini_tokens(text):
+    """Approximate Gemini token count (about 4 characters per token) without an API call"""
+    return math.ceil(len(text) / 4)
+
+def _summarize_gemini_sections(text):
+    """Split text into sections and summarize them concurrently; returns the joined notes and section count"""
+    sections = chunk_text_by_count(text, settings.GEMINI_SECTION_TOKENS, estimate_gemini_tokens)['chunks']
+    client = get_gemini_client()
+    config = {'max_output_tokens': settings.GEMINI_SECTION_OUTPUT_TOKENS}
+    
+    def summarize_section(numbered):
+        index, section = numbered
+        prompt = GEMINI_SECTION_PROMPT.format(index=index + 1, count=len(sections))
+        return client.generate(f"{prompt}\n\n{section}\n", generation_config=config)['text']
+    
+    # The client's rate limiter and concurrency bound apply to every section call
+    with ThreadPoolExecutor(max_workers=settings.GEMINI_MAX_CONCURRENCY) as pool:
+        notes = list(pool.map(summarize_section, enumerate(sections)))
+    if not any(note and note.strip() for note in notes):
+        raise RuntimeError('Gemini returned no notes for any section')
+    logger.info(f"Reduced {len(sections)} Gemini sections of {len(text)} characters to notes")
+    return '\n\n'.join(note.strip() for note in notes if note and note.strip()), len(sections)
+
+GEMINI_SUMMARY_PROMPT = """Analyze the following text and provide a structured summary. Follow these exact formatting rules:
 
 1. Start with a title line
 2. Add two newlines after the title
@@ -99,20 +615,60 @@ Important:
 - Use proper spacing throughout
 
 Please analyze and summarize the following text:"""
-        
-        # Prepare prompt for summarization
-        prompt = f"""{custom_prompt if custom_prompt else default_prompt}
+
+def _prepare_gemini_prompt(text, custom_prompt=None):
+    """Build the summary prompt, first reducing oversized text to section notes; returns (prompt, token_count, section_count)"""
+    # Oversized documents are first reduced to section notes, so no single
+    # call exceeds GEMINI_MAX_INPUT_TOKENS
+    token_count = estimate_gemini_tokens(text)
+    section_count = 0
+    while estimate_gemini_tokens(text) > settings.GEMINI_MAX_INPUT_TOKENS:
+        text, sections = _summarize_gemini_sections(text)
+        section_count += sections
+    
+    # Use custom prompt if provided, otherwise use default prompt
+    prompt = f"""{custom_prompt if custom_prompt else GEMINI_SUMMARY_PROMPT}
 
 {text}
 """
+    return prompt, token_count, section_count
+
+def get_gemini_summary(text, custom_prompt=None, max_length=150):
+    try:
+        prompt, token_count, section_count = _prepare_gemini_prompt(text, custom_prompt)
         
-        # Generate summary
-        response = model.generate_content(prompt)
+        # Generate summary through the shared, rate-limited client
+        response = get_gemini_client().generate(prompt)
         
         # Extract and return the summary
-        summary = response.text if response.text else "Gemini API could not generate a summary."
+        summary = response['text'] if response['text'] else "Gemini API could not generate a summary."
+        
+        return {'gemini_summary': summary, 'token_count': token_count, 'section_count': section_count}
+        
+    except Exception as e:
+        return {'gemini_summary': f"Error generating Gemini summary: {str(e)}"}
+
+def iter_gemini_summary_events(text, custom_prompt=None):
+    """
+    Generate a Gemini summary as a stream of events, forwarding text as Gemini produces it
+    
+    Yields dicts with an 'event' name:
+        'start': 'token_count' and 'section_count' (once any section notes are done)
+        'delta': the next piece of 'text'
+        'summary': the complete 'summary' with its 'token_count' and 'section_count'
+        'error': a failure message as 'summary'; nothing follows
+    """
+    try:
+        prompt, token_count, section_count = _prepare_gemini_prompt(text, custom_prompt)
+        yield {'event': 'start', 'token_count': token_count, 'section_count': section_count}
         
-        return {'gemini_summary': summary}
+        pieces = []
+        for piece in get_gemini_client().generate_stream(prompt):
+            pieces.append(piece)
+            yield {'event': 'delta', 'text': piece}
         
+        summary = ''.join(pieces) or "Gemini API could not generate a summary."
+        yield {'event': 'summary', 'summary': summary, 'token_count': token_count, 'section_count': section_count}
     except Exception as e:
-        return {'gemini_summary': f"Error generating Gemini summary: {str(e)}"}
\ No newline at end of file
+        logger.error(f"Error streaming Gemini summary: {str(e)}")
+        yield {'event': 'error', 'summary': f"Error generating Gemini summary: {str(e)}"}
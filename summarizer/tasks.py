@@ -1,11 +1,307 @@
-from celery import shared_task
+from celery import chain, chord, shared_task
 from deep_translator import GoogleTranslator
-from .models import PDFDocument
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.db.models.functions import Least
+from .models import PDFDocument, ImageDocument
+from .stream_utils import StreamPublisher, add_stream_channels, clear_stream
+import json
+import hashlib
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Progress (percent) reached at the end of each pipeline step; summarizing
+# moves from CHUNKED_PROGRESS towards SUMMARIZED_PROGRESS chunk by chunk
+EXTRACTED_PROGRESS = 15
+CHUNKED_PROGRESS = 25
+SUMMARIZED_PROGRESS = 95
+
+
+def _set_status(pdf_id, status, progress, message=''):
+    # update() rather than save() so concurrent steps never overwrite each other's fields
+    PDFDocument.objects.filter(pk=pdf_id).update(status=status, progress=progress, status_message=message[:255])
+
+
+def _fail(pdf_id, step, error):
+    logger.error(f"Summarization pipeline failed for PDF {pdf_id} while {step}: {str(error)}")
+    _set_status(pdf_id, 'failed', 100, f"{step.capitalize()} failed: {str(error)}")
+    pdf = PDFDocument.objects.filter(pk=pdf_id).first()
+    if pdf:
+        field = 'gemini_summary' if pdf.summary_type == 'gemini' else 'bert_summary'
+        setattr(pdf, field, "Summarization failed. Please try again.")
+        pdf.save(update_fields=[field])
+    clear_stream(pdf_id)
+
+
+def _plan_pdf(pdf):
+    """
+    What to summarize: the text for Gemini, SUMMARIZER_MODEL's chunks (see plan_summary) for BART
+
+    With MODEL_SERVER_URL set, BART plans carry just the text and a
+    'model_server' flag: the server chunks and summarizes it, so no worker
+    loads the model, not even for its tokenizer.
+    """
+    from .extractive_utils import prepare_summary_input
+    from .summarizer_utils import plan_summary
+
+    text = prepare_summary_input(pdf.get_extracted_text(), pdf.summary_mode)
+    if pdf.summary_type == 'gemini':
+        # get_gemini_summary splits oversized text into sections itself
+        return {'text': text}
+    if settings.MODEL_SERVER_URL:
+        return {'text': text, 'model_server': True}
+    # Nobody waits on a background job, so the tier policy's latency budget does not apply
+    return plan_summary(text, model=settings.SUMMARIZER_MODEL)
+
+
+def _store_plan(plan):
+    """Store a plan under its hash; pipeline messages carry only the key, not the document's text"""
+    plan_key = hashlib.sha256(json.dumps(plan, sort_keys=True).encode('utf-8')).hexdigest()
+    caches[settings.SUMMARIZER_PLAN_CACHE].set(f"summary-plan:{plan_key}", plan, settings.SUMMARIZER_PLAN_CACHE_TIMEOUT)
+    return plan_key
+
+
+def _load_plan(pdf_id, plan_key):
+    plan = caches[settings.SUMMARIZER_PLAN_CACHE].get(f"summary-plan:{plan_key}")
+    if plan is None:
+        # Evicted, or stored on another host: planning again gives the same plan for the same settings
+        logger.warning(f"Plan {plan_key[:12]} of PDF {pdf_id} is not in the plan cache, planning again")
+        plan = _plan_pdf(PDFDocument.objects.get(pk=pdf_id))
+    return plan
+
+
+def summarize_pdf_pipeline(pdf_id, queue=None, priority=None):
+    """
+    Summarize a PDF in the background: extract -> chunk -> summarize -> save
+
+    Each step is its own task, so workers are only held for one step at a
+    time and the document's status and progress show where it is. The steps
+    pass the document's id and the key of its plan in SUMMARIZER_PLAN_CACHE,
+    so chunk texts never go through the broker or the result backend.
+    The summarize steps publish their events like stream_summary does, so
+    the detail page shows sections (and Gemini's text) as they come in.
+
+    Args:
+        pdf_id: Primary key of the PDFDocument
+        queue: Celery queue of every step (default: CELERY_TASK_DEFAULT_QUEUE)
+        priority: Message priority of every step (default: CELERY_TASK_DEFAULT_PRIORITY)
+
+    Returns:
+        The AsyncResult of the chain
+    """
+    options = {key: value for key, value in (('queue', queue), ('priority', priority)) if value is not None}
+    _set_status(pdf_id, 'pending', 0, 'Waiting for a worker')
+    # Events of an earlier run would be relayed as this one's
+    clear_stream(pdf_id)
+    return chain(
+        extract_pdf_task.si(pdf_id).set(**options),
+        chunk_pdf_task.s().set(**options),
+        summarize_pdf_task.s().set(**options),
+        save_pdf_summary_task.s().set(**options)
+    ).apply_async()
+
+
+@shared_task(ignore_result=True)
+def extract_pdf_task(pdf_id):
+    """Extract the PDF's text into the content-hash store (and its page index onto the document)"""
+    _set_status(pdf_id, 'extracting', 5)
+    try:
+        pdf = PDFDocument.objects.get(pk=pdf_id)
+        text = pdf.get_extracted_text()
+    except Exception as e:
+        _fail(pdf_id, 'extracting text', e)
+        raise
+    _set_status(pdf_id, 'extracting', EXTRACTED_PROGRESS, f"Extracted {pdf.page_count} pages")
+    return {'pdf_id': pdf_id, 'characters': len(text)}
+
+
+@shared_task(ignore_result=True)
+def chunk_pdf_task(extracted):
+    """Reduce the text for fast mode and, for BART, split the text into SUMMARIZER_MODEL's chunks"""
+    pdf_id = extracted['pdf_id']
+    _set_status(pdf_id, 'chunking', EXTRACTED_PROGRESS)
+    try:
+        pdf = PDFDocument.objects.get(pk=pdf_id)
+        plan = _plan_pdf(pdf)
+        if pdf.summary_type == 'gemini':
+            message = 'Ready for Gemini'
+        elif plan.get('model_server'):
+            message = 'Ready for the model server'
+        elif plan.get('error'):
+            message = plan['error']
+        elif plan['model']:
+            message = f"{len(plan['chunks'])} sections for {plan['model']}"
+        else:
+            message = 'Extractive summary'
+        plan_key = _store_plan(plan)
+    except Exception as e:
+        _fail(pdf_id, 'preparing sections', e)
+        raise
+    _set_status(pdf_id, 'chunking', CHUNKED_PROGRESS, message)
+    return {'pdf_id': pdf_id, 'summary_type': pdf.summary_type, 'plan_key': plan_key}
+
+
+@shared_task(bind=True)
+def summarize_pdf_task(self, chunked):
+    """
+    Run the summarization model over the chunks, reporting progress per chunk
+
+    Documents with more than SUMMARIZER_FANOUT_CHUNKS chunks are handed to
+    a chord instead (see _fan_out_chunks), whose result continues the chain.
+    With a model server, the whole document is sent there instead.
+    The chord's tasks go to the queue this task came from, with its priority.
+    """
+    from .summarizer_utils import get_bert_gpt2_summary, iter_gemini_summary_events
+
+    pdf_id = chunked['pdf_id']
+    _set_status(pdf_id, 'summarizing', CHUNKED_PROGRESS)
+    publisher = StreamPublisher(pdf_id)
+    try:
+        plan = _load_plan(pdf_id, chunked['plan_key'])
+        if chunked['summary_type'] == 'gemini':
+            summary = "Gemini API could not generate a summary."
+            for event in iter_gemini_summary_events(plan['text']):
+                name = event.pop('event')
+                if name in ('summary', 'error'):
+                    summary = event['summary']
+                publisher.send(name, event)
+            return {'pdf_id': pdf_id, 'field': 'gemini_summary', 'summary': summary, 'backend': '', 'tier': '',
+                    'model': ''}
+        if plan.get('model_server'):
+            # One request for the whole document; the server reports no progress until it is done
+            summarized = get_bert_gpt2_summary(plan['text'])
+            publisher.send('summary', summarized)
+            return {'pdf_id': pdf_id, 'field': 'bert_summary', 'summary': summarized['summary'],
+                    'backend': summarized.get('backend', ''), 'tier': summarized.get('tier') or '',
+                    'model': summarized.get('model') or ''}
+
+        per_task = getattr(settings, 'SUMMARIZER_FANOUT_CHUNKS', 0)
+        if not (per_task and plan.get('model') and len(plan['chunks']) > per_task):
+            return _summarize_plan(pdf_id, plan, publisher=publisher)
+    except Exception as e:
+        _fail(pdf_id, 'summarizing', e)
+        raise
+    delivery = self.request.delivery_info or {}
+    options = {key: delivery[name] for key, name in (('queue', 'routing_key'), ('priority', 'priority'))
+               if delivery.get(name) is not None}
+    # Outside the try: replace() ends this task by raising Ignore
+    return self.replace(_fan_out_chunks(pdf_id, chunked['plan_key'], plan, per_task, options))
+
+
+def _summarize_plan(pdf_id, plan, chunk_summaries=None, publisher=None):
+    from .summarizer_utils import iter_plan_summary_events
+
+    publisher = publisher or StreamPublisher(pdf_id)
+    result = {'summary': 'Could not generate summary. Please try again.'}
+    total = 0
+    done = 0
+    reported = CHUNKED_PROGRESS
+    for event in iter_plan_summary_events(plan, chunk_summaries=chunk_summaries):
+        publisher.send(event['event'], {key: value for key, value in event.items() if key != 'event'})
+        if event['event'] == 'start':
+            total = event['chunk_count']
+        elif event['event'] == 'chunk':
+            done += 1
+            # The last steps are for the reduce levels; write only when the percentage moves
+            progress = min(CHUNKED_PROGRESS + (SUMMARIZED_PROGRESS - CHUNKED_PROGRESS) * done // max(total, 1),
+                           SUMMARIZED_PROGRESS - 5)
+            if progress > reported:
+                _set_status(pdf_id, 'summarizing', progress, f"Summarized {done} of {total} sections")
+                reported = progress
+        elif event['event'] == 'level' and event['level'] > 0:
+            _set_status(pdf_id, 'summarizing', SUMMARIZED_PROGRESS - 5,
+                        f"Combining {event['inputs']} section summaries")
+        elif event['event'] in ('summary', 'error'):
+            result = event
+    publisher.flush()
+    return {'pdf_id': pdf_id, 'field': 'bert_summary', 'summary': result['summary'],
+            'backend': result.get('backend', ''), 'tier': result.get('tier') or '', 'model': result.get('model') or ''}
+
+
+def _fan_out_chunks(pdf_id, plan_key, plan, per_task, options=None):
+    """Chord summarizing the plan's chunks per_task at a time on any free worker, then merging them in order"""
+    bounds = [(start, min(start + per_task, len(plan['chunks']))) for start in range(0, len(plan['chunks']), per_task)]
+    step = max(1, (SUMMARIZED_PROGRESS - 5 - CHUNKED_PROGRESS) // len(bounds))
+    _set_status(pdf_id, 'summarizing', CHUNKED_PROGRESS,
+                f"Summarizing {len(plan['chunks'])} sections in {len(bounds)} parallel tasks")
+    # Each task publishes its sections on its own channel; the merge publishes on the main one
+    add_stream_channels(pdf_id, [f"chunks-{start}" for start, _ in bounds])
+    StreamPublisher(pdf_id).send('start', {'chunk_count': len(plan['chunks']), 'token_count': plan['token_count']})
+    # Tasks get the plan's key and their chunk range; each loads the chunks itself
+    options = options or {}
+    return chord(
+        [summarize_chunks_task.s(pdf_id, plan_key, start, end, step).set(**options) for start, end in bounds],
+        merge_chunk_summaries_task.s(pdf_id, plan_key).set(**options)
+    )
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def summarize_chunks_task(pdf_id, plan_key, start, end, progress_step):
+    """
+    Summarize chunks start to end of a document's plan (a chord header task of summarize_pdf_task)
+
+    Acknowledged only when done, so if its worker dies the slice is run
+    again elsewhere; chunks it already finished come from the summary cache.
+    """
+    from .summarizer_utils import summarize_plan_chunks
+
+    try:
+        plan = _load_plan(pdf_id, plan_key)
+        summaries = summarize_plan_chunks(
+            dict(plan, chunks=plan['chunks'][start:end], chunk_tokens=plan['chunk_tokens'][start:end])
+        )
+    except Exception as e:
+        # Like a failed batch in summarize_chunks: the merge goes on without these chunks
+        logger.error(f"Summarizing chunks {start}-{end} of PDF {pdf_id} failed: {str(e)}")
+        summaries = [None] * (end - start)
+    # A slice run again after its worker died replaces its earlier events
+    publisher = StreamPublisher(pdf_id, channel=f"chunks-{start}", append=False)
+    for i, summary in enumerate(summaries):
+        publisher.send('chunk', {'index': start + i, 'summary': summary})
+    publisher.flush()
+    # Slices finish in any order, so progress is added rather than set
+    PDFDocument.objects.filter(pk=pdf_id).update(
+        progress=Least(F('progress') + progress_step, SUMMARIZED_PROGRESS - 5)
+    )
+    return summaries
+
+
 @shared_task
+def merge_chunk_summaries_task(results, pdf_id, plan_key):
+    """Join the chord's chunk summaries in chunk order and run the reduce step over them"""
+    _set_status(pdf_id, 'summarizing', SUMMARIZED_PROGRESS - 5, 'Combining section summaries')
+    try:
+        plan = _load_plan(pdf_id, plan_key)
+        return _summarize_plan(pdf_id, plan, chunk_summaries=[summary for result in results for summary in result])
+    except Exception as e:
+        _fail(pdf_id, 'summarizing', e)
+        raise
+
+
+@shared_task
+def save_pdf_summary_task(summarized):
+    """Store the summary on the document and mark it done, or failed if the summary is an error message"""
+    from .dedup_utils import FAILED_SUMMARY_MARKERS
+
+    pdf_id = summarized['pdf_id']
+    failed = any(marker in summarized['summary'] for marker in FAILED_SUMMARY_MARKERS)
+    updates = {
+        summarized['field']: summarized['summary'],
+        'status': 'failed' if failed else 'done',
+        'progress': 100,
+        'status_message': summarized['summary'][:255] if failed else ''
+    }
+    if summarized['field'] == 'bert_summary':
+        updates.update(summary_backend=summarized['backend'], summary_tier=summarized.get('tier', ''),
+                       summary_model=summarized.get('model', ''))
+    PDFDocument.objects.filter(pk=pdf_id).update(**updates)
+    clear_stream(pdf_id)
+    logger.info(f"Saved {summarized['field']} of PDF {pdf_id}")
+    return {'status': 'success', 'pdf_id': pdf_id}
+
+@shared_task(priority=0)
 def translate_summary_task(pdf_id, language):
     try:
         pdf = PDFDocument.objects.get(pk=pdf_id)
@@ -26,10 +322,10 @@ def translate_summary_task(pdf_id, language):
         translator = GoogleTranslator(source='auto', target=language)
         translated = translator.translate(original_summary)
         
-        # Update the PDF document
+        # Update the PDF document; only these fields, so a running summarize step is not overwritten
         pdf.translated_summary = translated
         pdf.current_language = language
-        pdf.save()
+        pdf.save(update_fields=['translated_summary', 'current_language'])
         
         logger.info(f"Successfully translated PDF {pdf_id} to {language}")
         return {'status': 'success', 'language': language}
@@ -41,6 +337,23 @@ def translate_summary_task(pdf_id, language):
         logger.error(f"Translation error for PDF {pdf_id}: {str(e)}")
         return {'status': 'error', 'message': f'Translation failed: {str(e)}'}
 
+@shared_task(priority=0)
+def translate_image_task(image_id, language):
+    """Translate an image's summary, or its extracted text if it has no summary"""
+    try:
+        image = ImageDocument.objects.get(pk=image_id)
+    except ImageDocument.DoesNotExist:
+        logger.error(f"Image with id {image_id} not found")
+        return {'status': 'error', 'message': 'Image not found'}
+    result = translate_text_sync(image.summary or image.extracted_text, language)
+    if result['status'] != 'success':
+        return result
+    image.translated_summary = result['translated_text']
+    image.current_language = language
+    image.save(update_fields=['translated_summary', 'current_language'])
+    logger.info(f"Successfully translated image {image_id} to {language}")
+    return {'status': 'success', 'language': language}
+
 def translate_text_sync(text, target_language):
     """
     Synchronous translation function that doesn't require Celery
@@ -56,4 +369,148 @@ def translate_text_sync(text, target_language):
         
     except Exception as e:
         logger.error(f"Translation error: {str(e)}")
-        return {'status': 'error', 'message': f'Translation failed: {str(e)}'}
\ No newline at end of file
+        return {'status': 'error', 'message': f'Translation failed: {str(e)}'}
+
+
+def _set_image_status(image_id, status, message=''):
+    ImageDocument.objects.filter(pk=image_id).update(status=status, status_message=message[:255])
+
+
+def _store_image_result(image_doc, result):
+    """Copy the OCR analysis results onto the document (without saving it)"""
+    # Store comprehensive analysis results
+    image_doc.summary = result.get('summary', '')
+    image_doc.extracted_text = result.get('text', '')
+    image_doc.labels = ', '.join(result.get('labels', [])) if result.get('labels') else ''
+    image_doc.detected_objects = ', '.join(result.get('objects', [])) if result.get('objects') else ''
+    image_doc.faces_detected = result.get('faces_detected', 0)
+    image_doc.analysis_source = result.get('source', 'tesseract_ocr')
+    image_doc.analysis_confidence = result.get('confidence', 0.0)
+
+    # Store classification data
+    if result.get('classification'):
+        classification = result['classification']
+        image_doc.image_type = classification.get('image_type', 'unknown')
+        image_doc.edge_density = classification.get('edge_density', 0.0)
+        image_doc.text_density = classification.get('text_density', 0.0)
+        image_doc.color_type = classification.get('color_info', {}).get('color_description', '')
+        image_doc.classification_data = classification
+
+    # Store analysis data
+    if result.get('analysis'):
+        analysis = result['analysis']
+        image_doc.word_count = analysis.get('text_analysis', {}).get('word_count', 0)
+        image_doc.character_count = analysis.get('text_analysis', {}).get('character_count', 0)
+        image_doc.text_quality = analysis.get('text_analysis', {}).get('text_quality', 'unknown')
+        image_doc.analysis_data = analysis
+
+    # Store image properties
+    if result.get('analysis', {}).get('image_properties'):
+        props = result['analysis']['image_properties']
+        image_doc.image_width = props.get('dimensions', {}).get('width', 0)
+        image_doc.image_height = props.get('dimensions', {}).get('height', 0)
+
+    # Store processing details
+    image_doc.processing_variant = result.get('processing_variant', '')
+    if result.get('ocr_config'):
+        image_doc.ocr_config = json.dumps(result['ocr_config'])
+
+
+def _refine_image_summary(result):
+    """Rewrite the OCR summary as a short factual note with Gemini; None if Gemini is unavailable or fails"""
+    from .summarizer_utils import get_gemini_summary
+
+    try:
+        context_text = (result.get('summary', '') or '') + "\n\nOCR Text (if any):\n" + (result.get('text', '') or '')
+        # Avoid overly long payloads
+        context_text = context_text[:6000]
+        # Build a compact, structured evidence block to reduce hallucinations
+        classification = result.get('classification') or {}
+        analysis_json = result.get('analysis') or {}
+        evidence_lines = [
+            f"image_type: {classification.get('image_type','unknown')}",
+            f"edge_density: {classification.get('edge_density',0)}",
+            f"text_density: {classification.get('text_density',0)}",
+            f"color_type: {analysis_json.get('image_properties',{}).get('color_type','unknown')}",
+            f"dimensions: {analysis_json.get('image_properties',{}).get('dimensions',{})}",
+            f"word_count: {analysis_json.get('text_analysis',{}).get('word_count',0)}",
+            f"text_quality: {analysis_json.get('text_analysis',{}).get('text_quality','unknown')}"
+        ]
+        evidence_block = "\n".join(evidence_lines) if evidence_lines else "Unknown"
+        ocr_snippet = (result.get('text','')[:600] or "Unknown")
+
+        custom = (
+            "You are an expert visual analyst. Write a concise, factual SHORT NOTE.\n\n"
+            "EVIDENCE (authoritative; do not contradict):\n" + evidence_block + "\n\n"
+            "OCR_SNIPPET (quote only if present):\n" + ocr_snippet + "\n\n"
+            "Output format:\n"
+            "- 5–8 bullet points\n"
+            "- Each bullet ≤ 15 words\n"
+            "- Cover: composition (layout, orientation, focus)\n"
+            "- Cover: colors/lighting (hues, brightness, contrast)\n"
+            "- Cover: notable elements (objects, structures, shapes, densities)\n"
+            "- Cover: any readable text (quote briefly if present)\n"
+            "- Cover: conservative context (scene type, setting)\n"
+            "- Final line: Takeaway: <most important single insight>\n"
+            "- Final line after that: Explanation: <2–3 short sentences citing the EVIDENCE fields you used>\n\n"
+            "Rules:\n"
+            "- Use ONLY EVIDENCE and OCR_SNIPPET; if missing, write 'Unknown'\n"
+            "- Be precise, concrete, and objective (e.g., 'Greenish cast', not 'Looks natural')\n"
+            "- Always mention dimensions if provided\n"
+            "- No extra sections, no speculation, no headings"
+        )
+        gemini = get_gemini_summary(context_text, custom_prompt=custom)
+        refined = gemini.get('gemini_summary')
+        if refined and 'Error' not in refined:
+            return refined
+    except Exception as e:
+        logger.debug(f"Gemini refinement skipped: {str(e)}")
+    return None
+
+
+def analyze_image(image_id):
+    """
+    Run OCR analysis and the Gemini refinement of an uploaded image and store the results
+
+    The document's status follows the steps: classifying, ocr, refining,
+    then done, or failed if no text or description could be produced.
+
+    Returns:
+        The result of extract_text_from_image ('success' False with an
+        'error' when the analysis failed)
+    """
+    from .dedup_utils import IMAGE_RESULT_FIELDS
+    from .ocr_utils import extract_text_from_image
+
+    image_doc = ImageDocument.objects.get(pk=image_id)
+    with image_doc.image.open('rb') as image_file:
+        result = extract_text_from_image(image_file, on_stage=lambda stage: _set_image_status(image_id, stage))
+    if not result['success']:
+        logger.error(f"OCR failed for image {image_id}: {result.get('error', 'Unknown error')}")
+        ImageDocument.objects.filter(pk=image_id).update(
+            status='failed', analysis_source='error', status_message=result.get('error', 'Unknown error')[:255]
+        )
+        return result
+
+    _store_image_result(image_doc, result)
+    _set_image_status(image_id, 'refining')
+    refined = _refine_image_summary(result)
+    if refined:
+        image_doc.summary = refined
+    image_doc.status = 'done'
+    image_doc.status_message = ''
+    # Only the analysis: the rest of the row may have changed since it was loaded
+    image_doc.save(update_fields=IMAGE_RESULT_FIELDS + ['analysis_data', 'status', 'status_message'])
+    return result
+
+
+@shared_task
+def process_image_task(image_id):
+    """Analyze an uploaded image in the background (see analyze_image)"""
+    try:
+        result = analyze_image(image_id)
+    except Exception as e:
+        logger.error(f"Image analysis failed for image {image_id}: {str(e)}")
+        _set_image_status(image_id, 'failed', f"Image analysis failed: {str(e)}")
+        raise
+    return {'status': 'success' if result['success'] else 'error', 'image_id': image_id, 'source': result.get('source')}
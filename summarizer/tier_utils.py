@@ -0,0 +1,88 @@
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from .model_registry import registry
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Weight of the newest run in the moving average of milliseconds per token
+EWMA_ALPHA = 0.2
+
+# Tier name -> {'ms_per_token', 'samples'} measured in this process
+_latency_stats: Dict[str, Dict[str, float]] = {}
+_latency_stats_lock = threading.Lock()
+
+
+def get_tiers() -> List[Dict[str, Any]]:
+    """Configured tiers, slowest and best first; a tier without a model is extractive-only"""
+    return settings.SUMMARIZER_TIERS
+
+
+def get_ms_per_token(tier: Dict[str, Any]) -> float:
+    """Measured milliseconds per input token of a tier, or its configured prior before any runs"""
+    with _latency_stats_lock:
+        stats = _latency_stats.get(tier['name'])
+        return stats['ms_per_token'] if stats else tier['prior_ms_per_token']
+
+
+def estimate_seconds(tier: Dict[str, Any], token_count: int) -> float:
+    """Predicted time to summarize a document with a tier, including loading its model if needed"""
+    seconds = token_count * get_ms_per_token(tier) / 1000
+    model = tier.get('model')
+    if model and not registry.is_loaded('summarization', model, settings.SUMMARIZER_DTYPE, settings.SUMMARIZER_BACKEND):
+        key = '/'.join(('summarization', model, settings.SUMMARIZER_DTYPE, settings.SUMMARIZER_BACKEND))
+        seconds += registry.load_times.get(key, settings.SUMMARIZER_TIER_LOAD_SECONDS)
+    return seconds
+
+
+def choose_tier(token_count: int, latency_budget: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Pick the best tier expected to finish within the latency budget
+
+    Args:
+        token_count: Tokens in the document
+        latency_budget: Seconds the caller can wait (default: SUMMARIZER_LATENCY_BUDGET)
+
+    Returns:
+        The chosen tier with its 'estimated_seconds'; the last (fastest) tier
+        when none fits the budget
+    """
+    latency_budget = latency_budget or settings.SUMMARIZER_LATENCY_BUDGET
+    tiers = get_tiers()
+    for tier in tiers:
+        estimate = estimate_seconds(tier, token_count)
+        if estimate <= latency_budget or tier is tiers[-1]:
+            logger.info(f"Tier {tier['name']} for {token_count} tokens: ~{estimate:.1f}s of a {latency_budget}s budget")
+            return dict(tier, estimated_seconds=round(estimate, 2))
+
+
+def record_latency(tier_name: str, token_count: int, seconds: float) -> None:
+    """Fold one measured run into the tier's moving average"""
+    if token_count <= 0:
+        return
+    ms_per_token = seconds * 1000 / token_count
+    with _latency_stats_lock:
+        stats = _latency_stats.get(tier_name)
+        if stats is None:
+            _latency_stats[tier_name] = {'ms_per_token': ms_per_token, 'samples': 1}
+        else:
+            stats['ms_per_token'] += EWMA_ALPHA * (ms_per_token - stats['ms_per_token'])
+            stats['samples'] += 1
+
+
+def get_tier_stats() -> Dict[str, Dict[str, float]]:
+    """Current per-token latency of every tier and how many runs it is based on"""
+    with _latency_stats_lock:
+        measured = {name: dict(stats) for name, stats in _latency_stats.items()}
+    return {
+        tier['name']: {
+            'model': tier.get('model'),
+            'ms_per_token': round(measured.get(tier['name'], {}).get('ms_per_token', tier['prior_ms_per_token']), 3),
+            'samples': measured.get(tier['name'], {}).get('samples', 0)
+        }
+        for tier in get_tiers()
+    }
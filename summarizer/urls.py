@@ -14,6 +14,8 @@ urlpatterns = [
     path('pdf/<int:pk>/download/', views.download_pdf, name='download_pdf'),
     path('pdfs/<int:pk>/ask/', views.ask_question, name='ask_question'),
     path('pdfs/<int:pk>/regenerate_summary/', views.regenerate_summary, name='regenerate_summary'),
+    path('pdfs/<int:pk>/summary/stream/', views.stream_summary, name='stream_summary'),
+    path('pdfs/<int:pk>/status/', views.pdf_status, name='pdf_status'),
     path('login/', auth_views.login_view, name='login'),
     path('logout/', auth_views.logout_view, name='logout'),
     path('register/', auth_views.register_view, name='register'),
@@ -21,6 +23,8 @@ urlpatterns = [
     path('images/upload/', views.upload_image, name='upload_image'),
     path('images/<int:pk>/', views.image_detail, name='image_detail'),
     path('images/<int:pk>/ask/', views.ask_image_question, name='ask_image_question'),
+    path('images/<int:pk>/ask/stream/', views.stream_image_answer, name='stream_image_answer'),
+    path('images/<int:pk>/status/', views.image_status, name='image_status'),
     path('images/<int:pk>/delete/', views.delete_image, name='delete_image'),
     path('images/<int:pk>/download/', views.download_image, name='download_image'),
     path('images/<int:pk>/update_language/', views.update_image_language, name='update_image_language'),
@@ -29,4 +33,5 @@ urlpatterns = [
     path('profile/', views.profile, name='profile'),
     path('profile/settings/', views.profile_settings, name='profile_settings'),
     path('update_language_preference/', views.update_language_preference, name='update_language_preference'),
+    path('health/ready/', views.readiness, name='readiness'),
 ]
\ No newline at end of file
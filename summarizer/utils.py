@@ -1,19 +1,16 @@
-import pdfplumber
-from transformers import pipeline
-
-def extract_text_from_pdf(pdf_file):
-    text = ""
-    with pdfplumber.open(pdf_file) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
+from django.conf import settings
+from .pdf_utils import extract_text_from_pdf  # noqa: F401
+from .chunk_utils import chunk_text_by_tokens
+from .model_registry import get_pipeline
 
 def get_bert_summary(text, max_length=150, min_length=50):
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+    summarizer = get_pipeline("summarization", settings.SUMMARIZER_MODEL, settings.SUMMARIZER_DTYPE,
+                              settings.SUMMARIZER_BACKEND)
+    if summarizer is None:
+        return "Summarizer not available"
     
-    # Split text into chunks if it's too long
-    max_chunk_length = 1024
-    chunks = [text[i:i + max_chunk_length] for i in range(0, len(text), max_chunk_length)]
+    # Split text into sentence-aligned chunks that fit the model's input
+    chunks = chunk_text_by_tokens(text, summarizer.tokenizer)['chunks']
     
     summaries = []
     for chunk in chunks:
@@ -25,11 +22,13 @@ def get_bert_summary(text, max_length=150, min_length=50):
     return ' '.join(summaries)
 
 def get_gpt2_summary(text, max_length=150):
-    summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+    summarizer = get_pipeline("summarization", settings.SUMMARIZER_MODEL, settings.SUMMARIZER_DTYPE,
+                              settings.SUMMARIZER_BACKEND)
+    if summarizer is None:
+        return "Summarizer not available"
     
     # Use different parameters for GPT-2 style summary
-    max_chunk_length = 1024
-    chunks = [text[i:i + max_chunk_length] for i in range(0, len(text), max_chunk_length)]
+    chunks = chunk_text_by_tokens(text, summarizer.tokenizer)['chunks']
     
     summaries = []
     for chunk in chunks:
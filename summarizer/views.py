@@ -7,19 +7,37 @@ from django.contrib import messages
 from django.views.generic import ListView
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import FileResponse, Http404, JsonResponse
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 from django.core.exceptions import ValidationError
 from django.conf import settings
 
 from .models import PDFDocument, ImageDocument, UserProfile
 from .forms import PDFUploadForm, ImageUploadForm, UserProfileForm
-from .summarizer_utils import extract_text_from_pdf, get_bert_gpt2_summary, get_gemini_summary
-from .ocr_utils import extract_text_from_image
-from .tasks import translate_summary_task, translate_text_sync
+from .model_registry import registry
+from .gemini_client import get_gemini_stats
+from .summarizer_utils import (
+    get_bert_gpt2_summary, get_gemini_summary, is_model_ready, get_model_load_stats, iter_summary_events,
+    get_batcher_stats, iter_gemini_summary_events
+)
+from .extractive_utils import prepare_summary_input
+from .cache_utils import compute_file_hash, get_summary_cache_stats
+from .tier_utils import get_tier_stats
+from .stream_utils import (
+    StreamPublisher, acquire_stream_lock, clear_stream, is_stream_locked, iter_relayed_events
+)
+from .dedup_utils import (
+    pdf_processing_key, image_processing_key, store_content_addressed,
+    find_reusable_pdf, copy_pdf_results, find_reusable_image, copy_image_results
+)
+from .tasks import (
+    translate_summary_task, translate_image_task, translate_text_sync, summarize_pdf_pipeline, process_image_task,
+    analyze_image
+)
 from .tts_utils import text_to_speech, get_speech_url
 from celery.result import AsyncResult
 import requests
+import time
 from bs4 import BeautifulSoup
 
 # Set up logging
@@ -30,15 +48,22 @@ logger = logging.getLogger(__name__)
 def regenerate_summary(request, pk):
     try:
         pdf = PDFDocument.objects.get(pk=pk, user=request.user)
-        text = extract_text_from_pdf(pdf.file)
+        text = pdf.get_extracted_text()
         
-        # Get summary type from request or use current type
+        # Get summary type and mode from request or use current ones
         summary_type = request.POST.get('summary_type', pdf.summary_type)
+        summary_mode = request.POST.get('summary_mode', pdf.summary_mode)
+        if summary_mode not in dict(PDFDocument.SUMMARY_MODE_CHOICES):
+            summary_mode = pdf.summary_mode
+        text = prepare_summary_input(text, summary_mode)
         
         try:
             if summary_type == 'bert_gpt2':
                 summaries = get_bert_gpt2_summary(text)
                 pdf.bert_summary = summaries['summary']
+                pdf.summary_backend = summaries.get('backend', '')
+                pdf.summary_tier = summaries.get('tier') or ''
+                pdf.summary_model = summaries.get('model') or ''
                 success_msg = 'BERT/GPT-2 summary regenerated successfully!'
             else:  # gemini
                 summaries = get_gemini_summary(text)
@@ -46,6 +71,8 @@ def regenerate_summary(request, pk):
                 success_msg = 'Gemini summary regenerated successfully!'
             
             pdf.summary_type = summary_type
+            pdf.summary_mode = summary_mode
+            pdf.processing_key = pdf_processing_key(summary_type, summary_mode)
             pdf.save()
             messages.success(request, success_msg)
             
@@ -81,6 +108,10 @@ def ask_question(request, pk):
                 summary_text = pdf.translated_summary
             else:
                 summary_text = pdf.gemini_summary if pdf.gemini_summary else pdf.bert_summary
+
+        # Fall back to the stored document text when no summary exists yet
+        if not summary_text:
+            summary_text = pdf.get_extracted_text()
         
         if summary_text:
             # Enhanced question answering with better context matching
@@ -276,30 +307,40 @@ def upload_pdf(request):
                 # Create PDFDocument instance but don't save yet
                 pdf_doc = form.save(commit=False)
                 pdf_doc.user = request.user
-                pdf_doc.title = os.path.splitext(request.FILES['file'].name)[0]
+                uploaded_file = request.FILES['file']
+                pdf_doc.title = os.path.splitext(uploaded_file.name)[0]
                 
-                # Extract text and generate summaries
-                text = extract_text_from_pdf(request.FILES['file'])
+                # Store the file once per distinct content
+                content_hash = compute_file_hash(uploaded_file)
+                pdf_doc.content_hash = content_hash
+                pdf_doc.processing_key = pdf_processing_key(pdf_doc.summary_type, pdf_doc.summary_mode)
+                pdf_doc.file = store_content_addressed(uploaded_file, content_hash, PDFDocument.file.field.upload_to)
                 
-                if pdf_doc.summary_type == 'bert_gpt2':
-                    try:
-                        summaries = get_bert_gpt2_summary(text)
-                        pdf_doc.bert_summary = summaries['summary']
-                        # Note: gpt2_summary field doesn't exist in the model, using bert_summary for both
-                    except Exception as e:
-                        messages.warning(request, f'BERT/GPT-2 summarization failed: {str(e)}')
-                        pdf_doc.bert_summary = "Summarization failed. Please try again."
-                else:  # gemini
+                # Reuse the summary of a byte-identical upload processed the same way
+                duplicate = find_reusable_pdf(content_hash, pdf_doc.processing_key)
+                if duplicate:
+                    copy_pdf_results(duplicate, pdf_doc)
+                    pdf_doc.save()
+                    messages.success(request, 'PDF uploaded. An identical document was already summarized, so its summary was reused.')
+                    return redirect('pdf_detail', pk=pdf_doc.pk)
+                
+                if settings.SUMMARIZER_ASYNC_PIPELINE:
+                    pdf_doc.status, pdf_doc.progress = 'pending', 0
+                pdf_doc.save()
+                if settings.SUMMARIZER_ASYNC_PIPELINE:
+                    # Extraction and summarization run in Celery; the detail page polls pdf_status
                     try:
-                        summaries = get_gemini_summary(text)
-                        pdf_doc.gemini_summary = summaries['gemini_summary']
+                        summarize_pdf_pipeline(pdf_doc.pk)
+                        messages.success(request, 'PDF uploaded. It is being summarized in the background.')
+                        return redirect('pdf_detail', pk=pdf_doc.pk)
                     except Exception as e:
-                        messages.warning(request, f'Gemini summarization failed: {str(e)}')
-                        pdf_doc.gemini_summary = "Summarization failed. Please try again."
+                        logger.warning(f"Could not queue PDF {pdf_doc.pk} for summarization, streaming instead: {str(e)}")
+                        PDFDocument.objects.filter(pk=pdf_doc.pk).update(status='done', progress=100, status_message='')
                 
-                # Save the document with summaries
-                pdf_doc.save()
-                messages.success(request, 'PDF uploaded and summarized successfully!')
+                # Otherwise the detail page streams the summary (stream_summary)
+                # as it is generated, section by section for BART and token by
+                # token for Gemini
+                messages.success(request, 'PDF uploaded. The summary appears below as it is generated.')
                 return redirect('pdf_detail', pk=pdf_doc.pk)
                 
             except Exception as e:
@@ -445,7 +486,14 @@ def update_language(request, pk):
             else:
                 return JsonResponse({'status': 'error', 'message': 'No summary available to translate'}, status=400)
 
-            # Use synchronous translation instead of Celery
+            if settings.SUMMARIZER_ASYNC_PIPELINE:
+                # Translate on the interactive queue; the page polls check_translation_status
+                try:
+                    task = translate_summary_task.delay(pdf.pk, language)
+                    return JsonResponse({'status': 'processing', 'task_id': task.id})
+                except Exception as e:
+                    logger.warning(f"Could not queue translation of PDF {pdf.pk}, translating inline: {str(e)}")
+
             translation_result = translate_text_sync(summary_to_translate, language)
             
             if translation_result['status'] == 'success':
@@ -466,6 +514,7 @@ def update_language(request, pk):
 
 @login_required
 def check_translation_status(request, task_id):
+    """State of a queued PDF or image translation (translate_summary_task, translate_image_task)"""
     task_result = AsyncResult(task_id)
     if task_result.ready():
         result = task_result.get()
@@ -487,13 +536,44 @@ def upload_image(request):
                 uploaded_file = request.FILES['image']
                 image_doc.title = os.path.splitext(uploaded_file.name)[0]
 
+                # Store the file once per distinct content
+                content_hash = compute_file_hash(uploaded_file)
+                image_doc.content_hash = content_hash
+                image_doc.processing_key = image_processing_key()
+                image_doc.image = store_content_addressed(uploaded_file, content_hash, ImageDocument.image.field.upload_to)
+
+                # Reuse the analysis of a byte-identical upload processed with the same OCR settings
+                duplicate = find_reusable_image(content_hash, image_doc.processing_key)
+                if duplicate:
+                    copy_image_results(duplicate, image_doc)
+                    image_doc.save()
+                    messages.success(request, 'Image uploaded. An identical image was already analyzed, so its results were reused.')
+                    return redirect('image_detail', pk=image_doc.pk)
+
+                if settings.SUMMARIZER_ASYNC_PIPELINE:
+                    image_doc.status = 'queued'
+                image_doc.save()
+                if settings.SUMMARIZER_ASYNC_PIPELINE:
+                    # OCR and the Gemini refinement run in Celery; the detail page polls image_status
+                    try:
+                        process_image_task.delay(image_doc.pk)
+                        messages.success(request, 'Image uploaded. It is being analyzed in the background.')
+                        return redirect('image_detail', pk=image_doc.pk)
+                    except Exception as e:
+                        logger.warning(f"Could not queue image {image_doc.pk} for analysis, analyzing now: {str(e)}")
+
                 # Extract information from image using enhanced OCR
-                result = extract_text_from_image(uploaded_file)
+                try:
+                    result = analyze_image(image_doc.pk)
+                except Exception:
+                    # Don't leave a document stuck in its first status behind
+                    image_doc.delete()
+                    raise
 
                 # Safer error display and consistent redirects
                 if not result['success']:
+                    image_doc.delete()
                     error_message = result.get('error', 'Unknown error')
-                    logger.error(f"OCR failed: {error_message}")
                     if 'Tesseract is not installed' in error_message:
                         messages.warning(request, 'Tesseract OCR is not installed.')
                         return redirect('tesseract_installation')
@@ -502,95 +582,7 @@ def upload_image(request):
                     else:
                         messages.error(request, f'Error processing image: {error_message}')
                     return redirect('upload_image')
-                
-                # Store comprehensive analysis results
-                image_doc.summary = result.get('summary', '')
-                image_doc.extracted_text = result.get('text', '')
-                image_doc.labels = ', '.join(result.get('labels', [])) if result.get('labels') else ''
-                image_doc.detected_objects = ', '.join(result.get('objects', [])) if result.get('objects') else ''
-                image_doc.faces_detected = result.get('faces_detected', 0)
-                image_doc.analysis_source = result.get('source', 'tesseract_ocr')
-                image_doc.analysis_confidence = result.get('confidence', 0.0)
-                
-                # Store classification data
-                if result.get('classification'):
-                    classification = result['classification']
-                    image_doc.image_type = classification.get('image_type', 'unknown')
-                    image_doc.edge_density = classification.get('edge_density', 0.0)
-                    image_doc.text_density = classification.get('text_density', 0.0)
-                    image_doc.color_type = classification.get('color_info', {}).get('color_description', '')
-                    image_doc.classification_data = classification
-                
-                # Store analysis data
-                if result.get('analysis'):
-                    analysis = result['analysis']
-                    image_doc.word_count = analysis.get('text_analysis', {}).get('word_count', 0)
-                    image_doc.character_count = analysis.get('text_analysis', {}).get('character_count', 0)
-                    image_doc.text_quality = analysis.get('text_analysis', {}).get('text_quality', 'unknown')
-                    image_doc.analysis_data = analysis
-                
-                # Store image properties
-                if result.get('analysis', {}).get('image_properties'):
-                    props = result['analysis']['image_properties']
-                    image_doc.image_width = props.get('dimensions', {}).get('width', 0)
-                    image_doc.image_height = props.get('dimensions', {}).get('height', 0)
-                
-                # Store processing details
-                image_doc.processing_variant = result.get('processing_variant', '')
-                if result.get('ocr_config'):
-                    import json
-                    image_doc.ocr_config = json.dumps(result['ocr_config'])
-                
-                # Optionally refine the summary using Gemini if API key is configured
-                try:
-                    context_text = (result.get('summary', '') or '') + "\n\nOCR Text (if any):\n" + (result.get('text', '') or '')
-                    # Avoid overly long payloads
-                    context_text = context_text[:6000]
-                    # Build a compact, structured evidence block to reduce hallucinations
-                    classification = result.get('classification') or {}
-                    analysis_json = result.get('analysis') or {}
-                    evidence_lines = [
-                        f"image_type: {classification.get('image_type','unknown')}",
-                        f"edge_density: {classification.get('edge_density',0)}",
-                        f"text_density: {classification.get('text_density',0)}",
-                        f"color_type: {analysis_json.get('image_properties',{}).get('color_type','unknown')}",
-                        f"dimensions: {analysis_json.get('image_properties',{}).get('dimensions',{})}",
-                        f"word_count: {analysis_json.get('text_analysis',{}).get('word_count',0)}",
-                        f"text_quality: {analysis_json.get('text_analysis',{}).get('text_quality','unknown')}"
-                    ]
-                    evidence_block = "\n".join(evidence_lines) if evidence_lines else "Unknown"
-                    ocr_snippet = (result.get('text','')[:600] or "Unknown")
-
-                    custom = (
-                        "You are an expert visual analyst. Write a concise, factual SHORT NOTE.\n\n"
-                        "EVIDENCE (authoritative; do not contradict):\n" + evidence_block + "\n\n"
-                        "OCR_SNIPPET (quote only if present):\n" + ocr_snippet + "\n\n"
-                        "Output format:\n"
-                        "- 5–8 bullet points\n"
-                        "- Each bullet ≤ 15 words\n"
-                        "- Cover: composition (layout, orientation, focus)\n"
-                        "- Cover: colors/lighting (hues, brightness, contrast)\n"
-                        "- Cover: notable elements (objects, structures, shapes, densities)\n"
-                        "- Cover: any readable text (quote briefly if present)\n"
-                        "- Cover: conservative context (scene type, setting)\n"
-                        "- Final line: Takeaway: <most important single insight>\n"
-                        "- Final line after that: Explanation: <2–3 short sentences citing the EVIDENCE fields you used>\n\n"
-                        "Rules:\n"
-                        "- Use ONLY EVIDENCE and OCR_SNIPPET; if missing, write 'Unknown'\n"
-                        "- Be precise, concrete, and objective (e.g., 'Greenish cast', not 'Looks natural')\n"
-                        "- Always mention dimensions if provided\n"
-                        "- No extra sections, no speculation, no headings"
-                    )
-                    gemini = get_gemini_summary(context_text, custom_prompt=custom)
-                    refined = gemini.get('gemini_summary')
-                    if refined and 'Error' not in refined:
-                        image_doc.summary = refined
-                except Exception as e:
-                    logger.debug(f"Gemini refinement skipped: {str(e)}")
 
-                # Save the document
-                image_doc.save()
-                
                 # Show appropriate success message
                 if result['source'] == 'google_vision':
                     messages.success(request, 'Image analyzed successfully using Google Cloud Vision!')
@@ -627,45 +619,19 @@ def ask_image_question(request, pk):
         if not question:
             return JsonResponse({'error': 'Question is required'}, status=400)
 
-        # Choose context: translated or original summary; fallback to extracted text
-        context_text = None
-        if image.current_language != 'en' and image.translated_summary:
-            context_text = image.translated_summary
-        else:
-            context_text = image.summary if image.summary else image.extracted_text
-
+        context_text = _image_question_context(image)
         if not context_text:
             return JsonResponse({'error': 'No content available to answer from'}, status=400)
 
         # Use Gemini for answer if available
-        prompt = f"""
-You are a helpful assistant. Given the following image analysis content, answer the user's question precisely and concisely.
-
-Image content:
-{context_text}
-
-Question: {question}
-
-Answer:
-"""
         try:
-            gemini = get_gemini_summary(prompt, custom_prompt="")
+            gemini = get_gemini_summary(_image_question_prompt(context_text, question), custom_prompt="")
             answer = gemini.get('gemini_summary') or ""
         except Exception as e:
             answer = ""
 
         if not answer:
-            # Simple heuristic fallback: return the most relevant sentences
-            import re
-            sentences = re.split(r'(?<=[.!?])\s+', context_text)
-            q = question.lower()
-            scored = []
-            for s in sentences:
-                score = sum(1 for w in q.split() if w in s.lower())
-                if score:
-                    scored.append((score, s))
-            scored.sort(reverse=True)
-            answer = ' '.join(s for _, s in scored[:3]) or context_text[:300]
+            answer = _fallback_image_answer(context_text, question)
 
         # Augment with quick web snippets for credibility
         try:
@@ -675,20 +641,7 @@ Answer:
         except Exception as e:
             logger.debug(f"Web search enrichment failed: {str(e)}")
 
-        # Store Q&A in analysis_data JSON
-        from django.utils import timezone
-        qa_entry = {
-            'ts': timezone.now().isoformat(),
-            'q': question,
-            'a': answer
-        }
-        data = image.analysis_data or {}
-        qa_list = data.get('qa', [])
-        qa_list.append(qa_entry)
-        data['qa'] = qa_list
-        image.analysis_data = data
-        image.save(update_fields=['analysis_data'])
-
+        _save_image_answer(image, question, answer)
         return JsonResponse({'status': 'success', 'answer': answer})
     except ImageDocument.DoesNotExist:
         return JsonResponse({'error': 'Image not found'}, status=404)
@@ -696,6 +649,97 @@ Answer:
         logger.exception(f"Error in ask_image_question: {str(e)}")
         return JsonResponse({'error': str(e)}, status=500)
 
+@login_required
+@require_POST
+def stream_image_answer(request, pk):
+    """Server-sent events: the Gemini answer to a question about an image as it is generated, then web sources"""
+    try:
+        image = ImageDocument.objects.get(pk=pk, user=request.user)
+    except ImageDocument.DoesNotExist:
+        return JsonResponse({'error': 'Image not found'}, status=404)
+    question = request.POST.get('question', '').strip()
+    if not question:
+        return JsonResponse({'error': 'Question is required'}, status=400)
+    context_text = _image_question_context(image)
+    if not context_text:
+        return JsonResponse({'error': 'No content available to answer from'}, status=400)
+
+    def events():
+        answer = ""
+        for event in iter_gemini_summary_events(_image_question_prompt(context_text, question), custom_prompt=""):
+            name = event.pop('event')
+            if name == 'delta':
+                yield _sse('delta', event)
+            elif name == 'summary':
+                answer = event['summary']
+        if not answer:
+            answer = _fallback_image_answer(context_text, question)
+            yield _sse('delta', {'text': answer})
+
+        # Web snippets only after the answer, so they do not delay its first tokens
+        try:
+            snippets = _web_search_snippets(question)
+            if snippets:
+                answer = f"{answer}\n\nSources:\n" + "\n".join([f"- {s}" for s in snippets[:3]])
+                yield _sse('sources', {'sources': snippets[:3]})
+        except Exception as e:
+            logger.debug(f"Web search enrichment failed: {str(e)}")
+
+        _save_image_answer(image, question, answer)
+        yield _sse('answer', {'answer': answer})
+        yield _sse('done', {})
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def _image_question_context(image):
+    """Context for questions about an image: translated or original summary; fallback to extracted text"""
+    if image.current_language != 'en' and image.translated_summary:
+        return image.translated_summary
+    return image.summary if image.summary else image.extracted_text
+
+def _image_question_prompt(context_text, question):
+    return f"""
+You are a helpful assistant. Given the following image analysis content, answer the user's question precisely and concisely.
+
+Image content:
+{context_text}
+
+Question: {question}
+
+Answer:
+"""
+
+def _fallback_image_answer(context_text, question):
+    """Simple heuristic fallback: return the most relevant sentences"""
+    import re
+    sentences = re.split(r'(?<=[.!?])\s+', context_text)
+    q = question.lower()
+    scored = []
+    for s in sentences:
+        score = sum(1 for w in q.split() if w in s.lower())
+        if score:
+            scored.append((score, s))
+    scored.sort(reverse=True)
+    return ' '.join(s for _, s in scored[:3]) or context_text[:300]
+
+def _save_image_answer(image, question, answer):
+    """Store Q&A in analysis_data JSON"""
+    from django.utils import timezone
+    qa_entry = {
+        'ts': timezone.now().isoformat(),
+        'q': question,
+        'a': answer
+    }
+    data = image.analysis_data or {}
+    qa_list = data.get('qa', [])
+    qa_list.append(qa_entry)
+    data['qa'] = qa_list
+    image.analysis_data = data
+    image.save(update_fields=['analysis_data'])
+
 def _web_search_snippets(query: str):
     """Fetch a few web snippets for the query using DuckDuckGo HTML results (no API key)."""
     headers = {
@@ -742,7 +786,14 @@ def update_image_language(request, pk):
             else:
                 return JsonResponse({'status': 'error', 'message': 'No text available to translate'}, status=400)
 
-            # Use synchronous translation
+            if settings.SUMMARIZER_ASYNC_PIPELINE:
+                # Translate on the interactive queue; the page polls check_translation_status
+                try:
+                    task = translate_image_task.delay(image.pk, language)
+                    return JsonResponse({'status': 'processing', 'task_id': task.id})
+                except Exception as e:
+                    logger.warning(f"Could not queue translation of image {image.pk}, translating inline: {str(e)}")
+
             translation_result = translate_text_sync(text_to_translate, language)
             
             if translation_result['status'] == 'success':
@@ -820,6 +871,161 @@ def image_text_to_speech(request, pk):
         }, status=500)
 
 
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _relay_summary_stream(pdf, field):
+    """Follow the summary another connection, or the background pipeline, is producing for this document"""
+    def running():
+        if is_stream_locked(pdf.pk):
+            return True
+        pdf.refresh_from_db(fields=['status'])
+        return pdf.is_processing
+    
+    finished = False
+    for name, data in iter_relayed_events(pdf.pk, running):
+        finished = finished or name in ('summary', 'error')
+        yield _sse(name, data)
+    if not finished:
+        pdf.refresh_from_db(fields=[field])
+        if getattr(pdf, field):
+            yield _sse('summary', {'summary': getattr(pdf, field)})
+        else:
+            yield _sse('error', {'summary': "Summarization was interrupted. Please reload to try again."})
+    yield _sse('done', {})
+
+
+@login_required
+def stream_summary(request, pk):
+    """
+    Server-sent events: the summary as it is generated (BART section by section, Gemini token by token), which is saved
+
+    Only one connection per document runs the summarizer; later ones (a
+    reload, a second tab, a reconnect) relay its events until it finishes,
+    as do connections made while the background pipeline summarizes it.
+    """
+    try:
+        pdf = PDFDocument.objects.get(pk=pk, user=request.user)
+    except PDFDocument.DoesNotExist:
+        raise Http404("PDF not found")
+    gemini = pdf.summary_type == 'gemini'
+    field = 'gemini_summary' if gemini else 'bert_summary'
+    
+    def events():
+        if pdf.is_processing:
+            yield from _relay_summary_stream(pdf, field)
+            return
+        if getattr(pdf, field):
+            yield _sse('summary', {'summary': getattr(pdf, field)})
+            yield _sse('done', {})
+            return
+        
+        token = acquire_stream_lock(pdf.pk)
+        if token is None:
+            yield from _relay_summary_stream(pdf, field)
+            return
+        # Every write keeps the lock alive for as long as the run makes progress
+        publisher = StreamPublisher(pdf.pk, token=token, append=False)
+        
+        def send(name, data):
+            publisher.send(name, data)
+            return _sse(name, data)
+        
+        try:
+            text = prepare_summary_input(pdf.get_extracted_text(), pdf.summary_mode)
+            if gemini:
+                stream = iter_gemini_summary_events(text)
+            elif settings.MODEL_SERVER_URL:
+                # The model server returns whole documents only
+                stream = [dict(get_bert_gpt2_summary(text), event='summary')]
+            else:
+                stream = iter_summary_events(text)
+            for event in stream:
+                name = event.pop('event')
+                if name in ('summary', 'error'):
+                    setattr(pdf, field, event['summary'])
+                    update_fields = [field]
+                    if not gemini:
+                        pdf.summary_backend = event.get('backend', '')
+                        pdf.summary_tier = event.get('tier') or ''
+                        pdf.summary_model = event.get('model') or ''
+                        update_fields += ['summary_backend', 'summary_tier', 'summary_model']
+                    pdf.save(update_fields=update_fields)
+                yield send(name, event)
+        except Exception as e:
+            logger.error(f"Error streaming summary for PDF {pk}: {str(e)}")
+            setattr(pdf, field, "Summarization failed. Please try again.")
+            pdf.save(update_fields=[field])
+            yield send('error', {'summary': getattr(pdf, field)})
+        finally:
+            # Also reached when the client disconnects and the generator is closed
+            clear_stream(pdf.pk, token=token)
+        yield _sse('done', {})
+    
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+def pdf_status(request, pk):
+    """Progress of a PDF's background summarization pipeline, polled by the detail page"""
+    try:
+        pdf = PDFDocument.objects.get(pk=pk, user=request.user)
+    except PDFDocument.DoesNotExist:
+        return JsonResponse({'error': 'PDF not found'}, status=404)
+    return JsonResponse({
+        'status': pdf.status,
+        'label': pdf.get_status_display(),
+        'progress': pdf.progress,
+        'message': pdf.status_message,
+        'processing': pdf.is_processing
+    })
+
+
+@login_required
+def image_status(request, pk):
+    """Progress of an image's background OCR analysis, polled by the detail page"""
+    try:
+        image = ImageDocument.objects.get(pk=pk, user=request.user)
+    except ImageDocument.DoesNotExist:
+        return JsonResponse({'error': 'Image not found'}, status=404)
+    return JsonResponse({
+        'status': image.status,
+        'label': image.get_status_display(),
+        'message': image.status_message,
+        'processing': image.is_processing
+    })
+
+
+def readiness(request):
+    """
+    Readiness probe: 200 once the summarization model can serve requests, 503 before
+
+    Without SUMMARIZER_PRELOAD (or a model server) nothing loads the model
+    until the first summary needs it, so the process is ready right away.
+    """
+    loaded = is_model_ready()
+    ready = loaded or not (settings.SUMMARIZER_PRELOAD or settings.MODEL_SERVER_URL)
+    load_stats = get_model_load_stats()
+    return JsonResponse({
+        'status': 'ready' if ready else 'not_ready',
+        'model': settings.SUMMARIZER_MODEL,
+        'model_loaded': loaded,
+        'model_server': settings.MODEL_SERVER_URL or None,
+        'load_seconds': load_stats['load_seconds'],
+        'error': load_stats['error'],
+        'registry': registry.get_stats(),
+        'summary_cache': get_summary_cache_stats(),
+        'tiers': get_tier_stats(),
+        'batchers': get_batcher_stats(),
+        'gemini': get_gemini_stats()
+    }, status=200 if ready else 503)
+
+
 def tesseract_installation(request):
     """View for displaying Tesseract OCR installation instructions"""
     return render(request, 'summarizer/tesseract_installation.html')